@@ -18,9 +18,18 @@ class GPIBConfig:
     t_step:  float =  0.0
     tol:     float = 0.1
     poll_s:  float = 0.25
+    telemetry_interval_s: float = 0.5   # Period of the batched TEC info read
     sweep_points: int = 0   # total points in this sweep
     sweep_index:  int = 0   # 0-based index of the current point
+    pipelined: bool = True  # write each point while the TEC ramps to the next
     stability_time: float = 5          # Time in seconds to check for stability
-    max_wait_time: float = 300.0          # Maximum wait time in seconds
+    max_wait_time: float = 0.0            # Maximum wait time in seconds, 0 waits until stable
     min_stability_readings: int = 5       # Minimum readings regardless of time
-    max_stability_readings: int = 100     # Lenght of reading lsit    
\ No newline at end of file
+    max_stability_readings: int = 100     # Lenght of reading lsit
+
+    # Predictive settling, stops waiting once an exponential fit has settled
+    predictive_settling: bool = True
+    fit_window_s: float = 60.0            # Readings kept for the fit
+    predicted_settle_s: float = -1.0      # Predicted time until stable, -1 if unknown
+    fit_temp_inf: float = 0.0             # Fitted asymptotic temperature
+    settled_by: str = ""                  # "window", "prediction" or "timeout", for the last wait    
\ No newline at end of file
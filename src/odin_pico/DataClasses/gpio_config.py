@@ -12,9 +12,16 @@ class GPIOConfig:
     listening: bool = False
     missed_triggers: int = 0
     unexpected_triggers: int = 0
+    trigger_perf: float = 0.0   # perf_counter time of the trigger awaiting capture
+    trigger_to_arm_ms: float = 0.0
+    prearm: bool = False
+    prearmed: bool = False
 
     def set_active(self, value):
         self.active = value
 
     def set_capture_run(self, value):
         self.capture_run = value
+
+    def set_prearm(self, value):
+        self.prearm = value
@@ -15,10 +15,10 @@ class PHAConfig:
 
 @dataclass
 class MetaDataConfig:
-    max_adc: ctypes.c_uint16 = ctypes.c_uint16()
-    max_samples: ctypes.c_int32 = ctypes.c_int32()
-    total_cap_samples: ctypes.c_int32 = ctypes.c_int32()
-    samples_per_seg: ctypes.c_int32 = ctypes.c_int32(0)
+    max_adc: ctypes.c_uint16 = field(default_factory=ctypes.c_uint16)
+    max_samples: ctypes.c_int32 = field(default_factory=ctypes.c_int32)
+    total_cap_samples: ctypes.c_int32 = field(default_factory=ctypes.c_int32)
+    samples_per_seg: ctypes.c_int32 = field(default_factory=ctypes.c_int32)
 
 @dataclass
 class CaptureRunConfig:
@@ -46,10 +46,26 @@ class CaptureConfig:
     capture_delay: int = 0
     capture_repeat: bool = False
     repeat_amount: int = 1
+    adaptive_block: bool = False
+    target_block_s: float = 1.0
+    max_block_s: float = 5.0
+    block_caps: int = 0
+    block_limit: str = ""
+    predicted_block_s: float = 0.0
+    early_stops: int = 0
+
+@dataclass
+class LiveViewConfig:
+    interval_s: float = 0.2
+    idle_timeout_s: float = 60.0   # 0 keeps live view running without clients
+    heartbeat_s: float = 5.0
+    idle: bool = False
+    last_client_get: float = 0.0
 
 @dataclass
 class ModeConfig:
-    handle: ctypes.c_int16 = ctypes.c_int16(0)
+    handle: ctypes.c_int16 = field(default_factory=ctypes.c_int16)
+    serial: str = ""   # empty opens the first scope found
     timebase: int = 2
     samp_time: int = 0
     _resolution: int = 1
@@ -74,6 +90,21 @@ class FileConfig:
     repeat_suffix: str = None   # e.g. "_3"
     trig_suffix: str = ""   # e.g. "0001"
     available_space: str = ""
+    rotate_enabled: bool = False
+    rotate_size_mb: float = 0.0
+    rotate_time_s: float = 0.0
+    parts_written: int = 0
+    swmr_enabled: bool = False
+    flush_interval_s: float = 1.0
+    rows_committed: int = 0
+    list_mode: bool = False
+    list_mode_parquet: bool = False
+    consolidate: bool = False
+    predicted_run_mb: float = 0.0
+    required_write_mbps: float = 0.0
+    disk_write_mbps: float = 0.0
+    disk_bound: bool = False
+    preflight_warning: str = ""
 
     @property
     def file_path(self) -> str:
@@ -206,6 +237,7 @@ class DeviceConfig:
     meta_data: MetaDataConfig = field(default_factory=MetaDataConfig)
     file: FileConfig = field(default_factory=FileConfig)
     pha: PHAConfig = field(default_factory=PHAConfig)
+    live_view: LiveViewConfig = field(default_factory=LiveViewConfig)
 
     def __post_init__(self):
         for name, channel in ChannelConfig.default_channel_configs().items():
@@ -1,6 +1,7 @@
 """Store settings to represent various status parameters """
 
 import ctypes
+import threading
 from dataclasses import dataclass, field
 
 @dataclass
@@ -10,18 +11,59 @@ class DeviceFlags:
     range_changed: bool = False
     user_capture: bool = False
     pico_mem_exceeded: bool = False
-    abort_cap: bool = False
     temp_set: bool = False
     temp_reached: bool = False
     system_state: str = "Waiting for connection"
+    _abort: threading.Event = field(default_factory=threading.Event, repr=False)
+    abort_perf: float = 0.0   # perf_counter time of the latest user abort
+    abort_latency_ms: float = 0.0
+
+    @property
+    def abort_cap(self) -> bool:
+        return self._abort.is_set()
+
+    @abort_cap.setter
+    def abort_cap(self, value: bool):
+        if value:
+            self._abort.set()
+        else:
+            self._abort.clear()
+
+    def wait_abort(self, timeout: float) -> bool:
+        """Sleep for timeout, returning True as soon as an abort is requested."""
+        return self._abort.wait(timeout)
+
+@dataclass
+class LiveTimeStatus:
+    """Live and dead time of the current run, times in seconds."""
+    real_time_s: float = 0.0
+    live_time_s: float = 0.0
+    dead_time_s: float = 0.0
+    dead_fraction: float = 0.0
+    blocks: int = 0
+    captures: int = 0
+    block_real_s: float = 0.0
+    block_live_s: float = 0.0
+    block_dead_fraction: float = 0.0
+    inter_block_gap_s: float = 0.0
+
+    def reset(self):
+        """Reset every value at the start of a run."""
+        for name, value in LiveTimeStatus().__dict__.items():
+            setattr(self, name, value)
+
+    def custom_asdict(self):
+        """Convert to a dictionary of rounded values for the tree and file metadata."""
+        return {name: round(value, 6) if isinstance(value, float) else value
+                for name, value in self.__dict__.items()}
 
 @dataclass
 class DeviceStatus:
     open_unit: int = -1
     stop: int = -1
     close: int = -1
-    block_check: ctypes.c_int16 = ctypes.c_int16(0)
-    block_ready: ctypes.c_int16 = ctypes.c_int16(0)
+    block_check: ctypes.c_int16 = field(default_factory=ctypes.c_int16)
+    block_ready: ctypes.c_int16 = field(default_factory=ctypes.c_int16)
     pico_setup_verify: int = -1
     pico_setup_complete: int = -1
     channel_setup_verify: int = -1
@@ -30,4 +72,5 @@ class DeviceStatus:
     channel_trigger_complete: int = -1
     capture_settings_verify: int = -1
     capture_settings_complete: int = -1
-    flags: DeviceFlags = field(default_factory=DeviceFlags)
\ No newline at end of file
+    flags: DeviceFlags = field(default_factory=DeviceFlags)
+    live_time: LiveTimeStatus = field(default_factory=LiveTimeStatus)
\ No newline at end of file
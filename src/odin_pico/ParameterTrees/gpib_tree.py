@@ -87,7 +87,7 @@ class GPIBTreeBuilder:
             ),
             "set_temp": (
                 lambda: None,
-                self.controller.set_temp_single_shot
+                self.controller.request_set_temp
             ),
             "c_lim": (
                 lambda: self.controller.util.iac_get(
@@ -114,51 +114,23 @@ class GPIBTreeBuilder:
         })
 
     def _create_gpib_info_tree(self):
-        """Create GPIB info parameter tree."""
-        return ParameterTree({
-            "tec_setpoint": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_setpoint"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-            "tec_volt_lim": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_volt_lim"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-            "tec_curr_lim": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_curr_lim"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-            "tec_current": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_current"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-            "tec_voltage": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_voltage"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-            "tec_power": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_power"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-            "tec_temp_meas": (
-                lambda: self.controller.util.iac_get(
-                    self.controller.gpib, 
-                    f"devices/{self.controller.gpib_config.selected_tec}/info/tec_temp_meas"
-                ) if self.controller.gpib_config.selected_tec else None, None
-            ),
-        })
+        """Create GPIB info parameter tree, served from the telemetry cache."""
+        telemetry = self.controller.tec_telemetry
+        info_fields = ("tec_setpoint", "tec_volt_lim", "tec_curr_lim", "tec_current",
+                       "tec_voltage", "tec_power", "tec_temp_meas")
+        info_tree = {
+            field: (lambda field=field: telemetry.get(field), None) for field in info_fields
+        }
+        info_tree["telemetry"] = {
+            "interval_s": (
+                lambda: self.gpib_config.telemetry_interval_s,
+                lambda v: set_dc_value(self.controller, self.gpib_config, "telemetry_interval_s", v)
+            ),
+            "age_s": (telemetry.age, None),
+            "polls": (lambda: telemetry.polls, None),
+            "errors": (lambda: telemetry.errors, None),
+        }
+        return ParameterTree(info_tree)
 
     def _create_gpib_temp_sweep_tree(self):
         """Create GPIB temperature sweep parameter tree."""
@@ -187,4 +159,23 @@ class GPIBTreeBuilder:
                 lambda: self.gpib_config.poll_s,
                 lambda v: set_dc_value(self.controller, self.gpib_config, "poll_s", v)
             ),
+            "pipelined": (
+                lambda: self.gpib_config.pipelined,
+                lambda v: set_dc_value(self.controller, self.gpib_config, "pipelined", v)
+            ),
+            "max_wait_time": (
+                lambda: self.gpib_config.max_wait_time,
+                lambda v: set_dc_value(self.controller, self.gpib_config, "max_wait_time", v)
+            ),
+            "predictive_settling": (
+                lambda: self.gpib_config.predictive_settling,
+                lambda v: set_dc_value(self.controller, self.gpib_config, "predictive_settling", v)
+            ),
+            "fit_window_s": (
+                lambda: self.gpib_config.fit_window_s,
+                lambda v: set_dc_value(self.controller, self.gpib_config, "fit_window_s", v)
+            ),
+            "predicted_settle_s": (lambda: self.gpib_config.predicted_settle_s, None),
+            "fit_temp_inf": (lambda: self.gpib_config.fit_temp_inf, None),
+            "settled_by": (lambda: self.gpib_config.settled_by, None),
         })
\ No newline at end of file
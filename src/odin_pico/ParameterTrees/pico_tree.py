@@ -155,7 +155,23 @@ class PicoTreeBuilder:
                 partial(set_dc_value, self.controller, self.dev_conf.capture, "capture_repeat"),
             ),
             "max_captures": (lambda: self.pico.rec_caps, None),
-            "max_time": (lambda: self.buffer_manager.estimate_max_time(), None)
+            "max_time": (lambda: self.buffer_manager.estimate_max_time(), None),
+            "adaptive_block": (
+                lambda: self.dev_conf.capture.adaptive_block,
+                partial(set_dc_value, self.controller, self.dev_conf.capture, "adaptive_block"),
+            ),
+            "target_block_s": (
+                lambda: self.dev_conf.capture.target_block_s,
+                partial(set_dc_value, self.controller, self.dev_conf.capture, "target_block_s"),
+            ),
+            "max_block_s": (
+                lambda: self.dev_conf.capture.max_block_s,
+                partial(set_dc_value, self.controller, self.dev_conf.capture, "max_block_s"),
+            ),
+            "block_caps": (lambda: self.dev_conf.capture.block_caps, None),
+            "block_limit": (lambda: self.dev_conf.capture.block_limit, None),
+            "predicted_block_s": (lambda: self.dev_conf.capture.predicted_block_s, None),
+            "early_stops": (lambda: self.dev_conf.capture.early_stops, None),
         })
 
     def create_mode_tree(self):
@@ -170,6 +186,7 @@ class PicoTreeBuilder:
                 partial(set_dc_value, self.controller, self.dev_conf.mode, "timebase"),
             ),
             "samp_time": (lambda: self.dev_conf.mode.samp_time, None),
+            "serial": (lambda: self.dev_conf.mode.serial, None),
         })
 
     def create_file_tree(self):
@@ -185,6 +202,49 @@ class PicoTreeBuilder:
                 partial(set_dc_value, self.controller, self.dev_conf.file, "file_name"),
             ),
             "file_path": (lambda: self.dev_conf.file.file_path, None),
+            "rotate_enabled": (
+                lambda: self.dev_conf.file.rotate_enabled,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "rotate_enabled"),
+            ),
+            "rotate_size_mb": (
+                lambda: self.dev_conf.file.rotate_size_mb,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "rotate_size_mb"),
+            ),
+            "rotate_time_s": (
+                lambda: self.dev_conf.file.rotate_time_s,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "rotate_time_s"),
+            ),
+            "parts_written": (lambda: self.dev_conf.file.parts_written, None),
+            "swmr_enabled": (
+                lambda: self.dev_conf.file.swmr_enabled,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "swmr_enabled"),
+            ),
+            "flush_interval_s": (
+                lambda: self.dev_conf.file.flush_interval_s,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "flush_interval_s"),
+            ),
+            "rows_committed": (lambda: self.dev_conf.file.rows_committed, None),
+            "list_mode": (
+                lambda: self.dev_conf.file.list_mode,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "list_mode"),
+            ),
+            "list_mode_parquet": (
+                lambda: self.dev_conf.file.list_mode_parquet,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "list_mode_parquet"),
+            ),
+            "consolidate": (
+                lambda: self.dev_conf.file.consolidate,
+                partial(set_dc_value, self.controller, self.dev_conf.file, "consolidate"),
+            ),
+            "predicted_run_mb": (lambda: self.dev_conf.file.predicted_run_mb, None),
+            "required_write_mbps": (lambda: self.dev_conf.file.required_write_mbps, None),
+            "disk_write_mbps": (lambda: self.dev_conf.file.disk_write_mbps, None),
+            "disk_bound": (lambda: self.dev_conf.file.disk_bound, None),
+            "preflight_warning": (lambda: self.dev_conf.file.preflight_warning, None),
+            "run_disk_benchmark": (
+                self.controller.disk_benchmark_running,
+                self.controller.run_disk_benchmark,
+            ),
             "curr_file_name": (lambda: self.dev_conf.file.curr_file_name, None),
             "last_write_success": (lambda: self.dev_conf.file.last_write_success, None),
             "max_acq_time": (
@@ -240,7 +300,7 @@ class PicoTreeBuilder:
         return ParameterTree({
             "run_user_capture": (
                 lambda: self.pico_status.flags.user_capture,
-                partial(set_dc_value, self.controller, self.pico_status.flags, "user_capture"),
+                self.controller.request_start,
             ),
             "clear_pha": (
                 lambda: self.dev_conf.pha.clear_pha,
@@ -253,9 +313,11 @@ class PicoTreeBuilder:
         return ParameterTree({
             "abort_cap": (
                 lambda: self.pico_status.flags.abort_cap,
-                partial(set_dc_value, self.controller, self.pico_status.flags, "abort_cap"),
+                self.controller.request_abort,
             ),
             "system_state": (lambda: self.pico_status.flags.system_state, None),
+            "abort_latency_ms": (lambda: self.pico_status.flags.abort_latency_ms, None),
+            "acquisition": (self.controller.acq_state.status, None),
         })
 
     def create_live_view_tree(self):
@@ -281,6 +343,28 @@ class PicoTreeBuilder:
             ),
             "current_tbdc_time": (lambda: self.pico.elapsed_time, None),
             "current_capture": (lambda: self.controller.dev_conf.capture_run.current_capture, None),
+            "live_time": (lambda: self.pico_status.live_time.custom_asdict(), None),
+            "trigger_rate": (lambda: self.buffer_manager.trigger_rate.rates, None),
+            "trigger_interval_hist": (self.buffer_manager.trigger_rate.histogram, None),
+            "idle": (lambda: self.dev_conf.live_view.idle, None),
+        })
+
+    def create_live_view_settings_tree(self):
+        """Create the live view scheduling settings tree."""
+        lv = self.dev_conf.live_view
+        return ParameterTree({
+            "interval_s": (
+                lambda: lv.interval_s,
+                partial(set_dc_value, self.controller, lv, "interval_s"),
+            ),
+            "idle_timeout_s": (
+                lambda: lv.idle_timeout_s,
+                partial(set_dc_value, self.controller, lv, "idle_timeout_s"),
+            ),
+            "heartbeat_s": (
+                lambda: lv.heartbeat_s,
+                partial(set_dc_value, self.controller, lv, "heartbeat_s"),
+            ),
         })
 
     def create_gpio_tree(self):
@@ -292,7 +376,70 @@ class PicoTreeBuilder:
             "gpio_captures": (lambda: self.gpio_config.gpio_captures, None),
             "listening": (lambda: self.gpio_config.listening, self.controller.set_listening),
             "missed_triggers": (lambda: self.gpio_config.missed_triggers, None),
-            "unexpected_triggers": (lambda: self.gpio_config.unexpected_triggers, None)
+            "unexpected_triggers": (lambda: self.gpio_config.unexpected_triggers, None),
+            "trigger_to_arm_ms": (lambda: self.gpio_config.trigger_to_arm_ms, None),
+            "prearm": (lambda: self.gpio_config.prearm, self.gpio_config.set_prearm),
+            "prearmed": (lambda: self.gpio_config.prearmed, None),
+            "trigger_to_arm": (
+                partial(self.controller.metrics.summary, "trigger_to_arm"), None
+            ),
+        })
+
+    def create_metrics_tree(self):
+        """Create the per-phase acquisition timing tree."""
+        metrics = self.controller.metrics
+        phase_trees = {
+            phase: (partial(metrics.summary, phase), None)
+            for phase in metrics.PHASES
+        }
+        phase_trees["reset"] = (lambda: None, metrics.reset)
+        return ParameterTree(phase_trees)
+
+    def create_debug_tree(self):
+        """Create the debugging tree, holding the acquisition thread, trace recorder and profiler."""
+        tracer = self.controller.tracer
+        profiler = self.controller.profiler
+        return ParameterTree({
+            "acquisition_thread": (lambda: self.controller.acq_thread_info, None),
+            "analysis_worker": (
+                lambda: (self.controller.analysis_worker.status()
+                         if self.controller.analysis_worker else {"alive": False}), None
+            ),
+            "trace": {
+                "enable": (lambda: tracer.enabled, tracer.set_enabled),
+                "capacity": (lambda: tracer.capacity, tracer.set_capacity),
+                "events": (lambda: len(tracer.events), None),
+                "clear": (lambda: None, tracer.clear),
+                "dump": (lambda: None, self.controller.dump_trace),
+                "last_dump": (lambda: tracer.last_dump, None),
+            },
+            "profile": {
+                "mode": (lambda: profiler.mode, profiler.set_mode),
+                "duration_s": (lambda: profiler.duration_s, profiler.set_duration),
+                "sample_interval_ms": (
+                    lambda: profiler.sample_interval_ms, profiler.set_sample_interval
+                ),
+                "start": (lambda: None, self.controller.start_profile),
+                "stop": (lambda: None, profiler.stop),
+                "active": (lambda: profiler.active, None),
+                "elapsed": (profiler.elapsed, None),
+                "samples": (lambda: profiler.samples, None),
+                "last_output": (lambda: profiler.last_output, None),
+            },
+        })
+
+    def create_jobs_tree(self):
+        """Create the capture job queue tree."""
+        jobs = self.controller.jobs
+        return ParameterTree({
+            "submit": (lambda: None, jobs.submit),
+            "queue": (jobs.status, None),
+            "current": (lambda: jobs.current.name if jobs.current else "", None),
+            "pending": (lambda: sum(job.state == "queued" for job in jobs.jobs), None),
+            "done": (lambda: sum(job.state == "done" for job in jobs.jobs), None),
+            "failed": (lambda: sum(job.state in ("failed", "aborted") for job in jobs.jobs), None),
+            "paused": (lambda: jobs.paused, jobs.set_paused),
+            "clear": (lambda: None, jobs.clear),
         })
 
     def build_device_tree(self):
@@ -303,6 +450,9 @@ class PicoTreeBuilder:
         pico_flags = self.create_flags_tree()
         live_view = self.create_live_view_tree()
         gpio_tree = self.create_gpio_tree()
+        metrics_tree = self.create_metrics_tree()
+        debug_tree = self.create_debug_tree()
+        jobs_tree = self.create_jobs_tree()
         
         # Create settings tree
         pico_settings = ParameterTree({
@@ -312,6 +462,7 @@ class PicoTreeBuilder:
             "capture": self.create_capture_tree(),
             "file": self.create_file_tree(),
             "pha": self.create_pha_tree(),
+            "live_view": self.create_live_view_settings_tree(),
         })
 
         # Return the complete device parameter tree
@@ -321,5 +472,8 @@ class PicoTreeBuilder:
             "settings": pico_settings,
             "flags": pico_flags,
             "live_view": live_view,
-            "gpio": gpio_tree 
+            "gpio": gpio_tree,
+            "metrics": metrics_tree,
+            "debug": debug_tree,
+            "jobs": jobs_tree,
         })
@@ -7,6 +7,7 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from odin_pico.pico_controller import PicoController
 
+from odin_pico.buffer_manager import LIST_MODE_DTYPE
 from odin_pico.Utilities.pico_util import PicoUtil
 
 class ControllerUtil:
@@ -168,6 +169,67 @@ class ControllerUtil:
         else:
             self.controller.dev_conf.capture_run.caps_in_run = self.controller.dev_conf.capture_run.caps_max
 
+    def preflight_check(self):
+        """
+        Predict the size and data rate of the capture the user is about to start,
+        and warn when it would fill the destination disk or outrun its write speed.
+        Uses the measured trigger rate and the last disk write benchmark of the
+        destination folder, if one has been run.
+        """
+        ctrl = self.controller
+        file_conf = ctrl.dev_conf.file
+        capture = ctrl.dev_conf.capture
+        file_conf.disk_write_mbps = ctrl.file_writer.disk_write_mbps()
+
+        samples = capture.pre_trig_samples + capture.post_trig_samples
+        channels = [getattr(ctrl.dev_conf, f"channel_{name}") for name in ctrl.dev_conf.channel_names]
+        active = [chan for chan in channels if chan.active]
+        waveform_chans = sum(1 for chan in active if chan.waveformsToggled)
+
+        # waveforms, trigger timing and list-mode records for every capture
+        bytes_per_cap = samples * 2 * waveform_chans + 8
+        if file_conf.list_mode:
+            bytes_per_cap += LIST_MODE_DTYPE.itemsize * len(active)
+
+        avg_dt = ctrl.buffer_manager.avg_trigger_dt()
+        cap_period = samples * ctrl.dev_conf.mode.samp_time + avg_dt
+
+        if capture.capture_type:
+            caps_per_run = capture.capture_time / cap_period if cap_period > 0 else 0
+        else:
+            caps_per_run = capture.n_captures
+
+        runs = capture.repeat_amount if capture.capture_repeat else 1
+        if ctrl.gpib_config.active and ctrl.gpib_config.control_enabled:
+            runs *= len(ctrl.gpib_util.temp_range(
+                ctrl.gpib_config.t_start, ctrl.gpib_config.t_end, ctrl.gpib_config.t_step))
+        if ctrl.gpio_config.active:
+            runs *= ctrl.gpio_config.capture_run
+
+        run_bytes = bytes_per_cap * caps_per_run * runs
+        file_conf.predicted_run_mb = round(run_bytes / 1024**2, 1)
+        file_conf.required_write_mbps = (
+            round(bytes_per_cap / cap_period / 1024**2, 1) if cap_period > 0 else 0.0
+        )
+
+        warnings = []
+        if avg_dt == 0:
+            warnings.append("Trigger rate not yet measured")
+        free_bytes = ctrl.file_writer.free_space_bytes()
+        if run_bytes > free_bytes:
+            warnings.append(
+                f"Predicted run of {run_bytes / 1024**3:.1f}GB exceeds "
+                f"{free_bytes / 1024**3:.1f}GB free space")
+        file_conf.disk_bound = (
+            file_conf.disk_write_mbps > 0 and
+            file_conf.required_write_mbps > file_conf.disk_write_mbps
+        )
+        if file_conf.disk_bound:
+            warnings.append(
+                f"Data rate of {file_conf.required_write_mbps}MB/s exceeds disk write speed "
+                f"of {file_conf.disk_write_mbps}MB/s")
+        file_conf.preflight_warning = ", ".join(warnings)
+
     def calc_samp_time(self):
         """Calculate the sample interval based on the resolution and timebase."""
         if self.controller.dev_conf.mode.resolution == 0:
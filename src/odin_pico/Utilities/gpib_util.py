@@ -8,6 +8,8 @@ import time
 import re
 from collections import deque
 
+from odin_pico.tec_settling import SettlingEstimator
+
 
 class GPIBUtil:
     """Class containing GPIB and temperature related functions."""
@@ -15,28 +17,56 @@ class GPIBUtil:
     def __init__(self, controller:PicoController):
         """Initialise with controller reference."""
         self.controller = controller
+        self.settling = SettlingEstimator()
 
     def wait_for_tec(self, target: float, tol: float):
         """
-        Simple temperature stability check with basic logging.
-        Waits for temperature to remain stable within tolerance for specified time.
+        Temperature stability check with basic logging.
+        Waits for temperature to remain stable within tolerance for specified time,
+        or, with predictive settling, until an exponential fit of the recent
+        readings has settled within tolerance, whichever comes first.
         """
         sweep_config = self.controller.gpib_config
+        telemetry = self.controller.tec_telemetry
+
+        # Readings come from the telemetry cache, so arrive no faster than it is refreshed
+        sample_s = sweep_config.poll_s
+        if telemetry.running:
+            sample_s = max(sample_s, sweep_config.telemetry_interval_s)
 
         # Simple time-based calculation
-        stability_readings = int(sweep_config.stability_time / sweep_config.poll_s)
+        stability_readings = max(int(sweep_config.stability_time / sample_s), 1)
         errors = deque(maxlen=stability_readings)
+
+        self.settling.reset()
+        self.settling.window_s = sweep_config.fit_window_s
+        self.settling.min_readings = sweep_config.min_stability_readings
+        sweep_config.predicted_settle_s = -1.0
+        sweep_config.settled_by = ""
         
         start_time = time.time()
         logging.info(f"[TEC] Waiting for {target:.2f}°C ± {tol:.2f}°C")  
         reading_count = 0
+        last_stamp = None
         
         while not self.controller.pico_status.flags.abort_cap:
+            if sweep_config.max_wait_time > 0 and time.time() - start_time > sweep_config.max_wait_time:
+                sweep_config.settled_by = "timeout"
+                logging.error(f"[TEC] Not stable within {sweep_config.max_wait_time:.0f}s, "
+                              f"continuing at {target:.2f}°C")
+                return
+
             # Get current temperature
-            meas = self.controller.util.iac_get(
-                self.controller.gpib, 
-                f"devices/{self.controller.gpib_config.selected_tec}/info/tec_temp_meas"
-            )
+            stamp, meas = telemetry.read("tec_temp_meas")
+            if telemetry.running and (stamp == last_stamp or not stamp):
+                # no new sample yet, unless the poller has stopped getting any,
+                # or has not got one since the wait started
+                if time.time() - (stamp or start_time) > max(5.0, 10 * sample_s):
+                    logging.error("[TEC] Telemetry is no longer updating")
+                    break
+                self.controller.pico_status.flags.wait_abort(sweep_config.poll_s)
+                continue
+            last_stamp = stamp
             if meas is None:
                 logging.error("[TEC] Failed to read temperature")
                 break
@@ -45,6 +75,20 @@ class GPIBUtil:
             error = meas - target
             errors.append(error)
             reading_count += 1
+
+            if sweep_config.predictive_settling:
+                self.settling.add(stamp, meas)
+                fit = self.settling.update()
+                if fit is not None:
+                    sweep_config.fit_temp_inf = round(fit["temp_inf"], 3)
+                    sweep_config.predicted_settle_s = round(
+                        self.settling.predicted_settle_s(target, tol), 1)
+                    if self.settling.is_stable(target, tol):
+                        sweep_config.settled_by = "prediction"
+                        logging.info(f"[TEC] Temperature settling to {fit['temp_inf']:.2f}°C "
+                                     f"(tau {fit['tau_s']:.1f}s, noise ±{fit['sigma']:.3f}°C, "
+                                     f"total time: {time.time() - start_time:.1f}s)")
+                        return
             
             if reading_count % 10 == 0:
                 elapsed = time.time() - start_time
@@ -57,19 +101,41 @@ class GPIBUtil:
                 mean_error = sum(abs(e) for e in errors) / len(errors)
                 
                 if mean_error <= tol:
+                    sweep_config.settled_by = "window"
+                    sweep_config.predicted_settle_s = 0.0
                     elapsed_time = time.time() - start_time
-                    actual_stability_time = len(errors) * sweep_config.poll_s
+                    actual_stability_time = len(errors) * sample_s
                     logging.info(f"[TEC] Temperature stable at {meas:.2f}°C "
                                 f"(±{mean_error:.3f}°C over {actual_stability_time:.1f}s, "
                                 f"total time: {elapsed_time:.1f}s)")
                     return
-            time.sleep(sweep_config.poll_s)
+            self.controller.pico_status.flags.wait_abort(sweep_config.poll_s)
+
+    def set_tec_temp(self, T: float):
+        """Send a set point to the selected TEC."""
+        self.controller.util.iac_set(
+            self.controller.gpib,
+            f"devices/{self.controller.gpib_config.selected_tec}/set/temp_set",
+            float(T)
+        )
+
+    def _finish_write(self, pending):
+        """Wait for the background write of the previous sweep point to complete."""
+        if pending is None:
+            return
+        try:
+            pending.result()
+        except Exception as e:
+            logging.error(f"[TEC-sweep] Writing the previous point failed: {e}")
 
     def run_temperature_sweep(self):
         """
         Iterate over every temperature in the listeven in SIM mode
         and acquire data.  A guard flag prevents any single capture from
         setting `abort_cap` and killing the rest of the sweep.
+        When pipelined, the next set point is sent as soon as a point has been
+        acquired and its file is written in the housekeeping pool while the TEC
+        ramps, the write is waited for before the next capture starts.
         """
         sweep = self.controller.gpib_config
         if not sweep.active:
@@ -80,28 +146,33 @@ class GPIBUtil:
         logging.info(f"[TEC-sweep] Set-points: {temps}")
 
         base_fname = self.clean_base_fname()
+        time_based = self.controller.dev_conf.capture.capture_type
 
         # local flag so abort in one capture doesn’t cancel the sweep
         sweep_abort = False
+        # index of the set point already sent, and the write still running
+        sent_idx = None
+        pending_write = None
 
         for idx, T in enumerate(temps):
             self.controller.gpib_config.sweep_index  = idx
             logging.debug(f"Current temp sweep: {self.controller.gpib_config.sweep_index}")
             if sweep_abort:
                 break
-            
-            self.controller.util.iac_set(
-                self.controller.gpib,
-                f"devices/{self.controller.gpib_config.selected_tec}/set/temp_set",
-                float(T)
-            )
-            self.controller.buffer_manager.temp_set_last = T
+
+            if sent_idx != idx:
+                self.set_tec_temp(T)
 
             self.wait_for_tec(T, sweep.tol)
-            self.controller.buffer_manager.temp_meas_last = self.controller.util.iac_get(
-                self.controller.gpib,
-                f"devices/{self.controller.gpib_config.selected_tec}/info/tec_temp_meas")
-                
+            _, temp_meas = self.controller.tec_telemetry.read("tec_temp_meas")
+
+            # the previous point's file still reads the buffers and temperature attributes
+            self._finish_write(pending_write)
+            pending_write = None
+
+            self.controller.buffer_manager.temp_set_last = T
+            self.controller.buffer_manager.temp_meas_last = temp_meas
+            self.controller.buffer_manager.temp_settled_by = sweep.settled_by
             self.controller.dev_conf.file.temp_suffix = str(self.temp_suffix(T))
 
             # reset abort flag before each capture; if *this* capture sets it,
@@ -109,13 +180,23 @@ class GPIBUtil:
             self.controller.pico_status.flags.abort_cap = False
 
             try:
-                if self.controller.dev_conf.capture.capture_type:     # time-based
-                    self.controller.tb_capture()
+                if time_based:
+                    self.controller.tb_capture(write=not sweep.pipelined)
                 else:                                      # fixed-count
-                    self.controller.user_capture(True)
+                    self.controller.user_capture(True, write=not sweep.pipelined)
             except Exception as e:
                 logging.error(f"Capture failed at {T}°C: {e}")
                 sweep_abort = True
+                continue
+
+            if sweep.pipelined:
+                if idx + 1 < len(temps):
+                    self.set_tec_temp(temps[idx + 1])
+                    sent_idx = idx + 1
+                pending_write = self.controller.executor.submit(
+                    self.controller.write_capture, time_based)
+
+        self._finish_write(pending_write)
 
         # restore original file_name
         self.controller.dev_conf.file.file_name = base_fname + ".hdf5"
@@ -0,0 +1,98 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from odin_pico.pico_controller import PicoController
+
+import psutil
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class MetricsExporter:
+    """Render acquisition and host resource metrics in the OpenMetrics text format.
+
+    Every value is read without locking from counters that the acquisition
+    thread updates, so a scrape can never stall a capture. When several scopes
+    are driven by the adapter each sample carries a serial label.
+    """
+
+    def __init__(self, controllers: dict[str, PicoController], prefix: str = "odin_pico"):
+        """Initialise with the controllers to export, keyed by serial ("" for a single scope)."""
+        self.controllers = controllers
+        self.prefix = prefix
+
+    def _family(self, lines, name, metric_type, help_text, samples):
+        """Append a metric family, samples are (suffix, labels, value) tuples."""
+        lines.append(f"# TYPE {self.prefix}_{name} {metric_type}")
+        lines.append(f"# HELP {self.prefix}_{name} {help_text}")
+        for suffix, labels, value in samples:
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            label_str = f"{{{label_str}}}" if label_str else ""
+            lines.append(f"{self.prefix}_{name}{suffix}{label_str} {value}")
+
+    def _per_scope(self, suffix, value_fn, **labels):
+        """Return one sample per controller of value_fn(controller)."""
+        return [
+            (suffix, {**({"serial": serial} if serial else {}), **labels}, value_fn(controller))
+            for serial, controller in self.controllers.items()
+        ]
+
+    @staticmethod
+    def buffer_pool_bytes(controller: PicoController) -> int:
+        """Return the bytes currently held in capture buffers."""
+        buffer_manager = controller.buffer_manager
+        arrays = list(buffer_manager.np_channel_arrays)
+        arrays += [arr for block in buffer_manager.capture_blocks for arr in block]
+        # time-based blocks are referenced by np_channel_arrays as well
+        return sum(arr.nbytes for arr in {id(arr): arr for arr in arrays}.values())
+
+    def render(self) -> str:
+        """Return the current metrics as an OpenMetrics text exposition."""
+        lines = []
+
+        for name, help_text in (
+            ("captures", "Captures retrieved from the scope."),
+            ("blocks", "Rapid block runs completed."),
+            ("bytes_written", "Capture bytes written to HDF5 files."),
+            ("write_failures", "Failed HDF5 writes."),
+            ("missed_triggers", "GPIO triggers missed while a capture was running."),
+            ("unexpected_triggers", "GPIO triggers received while not listening."),
+        ):
+            self._family(lines, name, "counter", help_text,
+                         self._per_scope("_total", lambda c, n=name: c.metrics.counters[n]))
+
+        self._family(lines, "last_write_success", "gauge", "1 if the last HDF5 write succeeded.",
+                     self._per_scope("", lambda c: int(c.dev_conf.file.last_write_success)))
+        self._family(lines, "trigger_interval_mean_seconds", "gauge",
+                     "Mean interval between recent triggers.",
+                     self._per_scope("", lambda c: c.buffer_manager.avg_trigger_dt()))
+        self._family(lines, "buffer_pool_bytes", "gauge", "Bytes held in capture buffers.",
+                     self._per_scope("", self.buffer_pool_bytes))
+
+        phase_samples = []
+        for serial, controller in self.controllers.items():
+            metrics = controller.metrics
+            scope_labels = {"serial": serial} if serial else {}
+            for phase in metrics.PHASES:
+                labels = {**scope_labels, "phase": phase}
+                cumulative = 0
+                for bound, bucket_count in zip(metrics.BUCKETS, metrics.histograms[phase]):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    phase_samples.append(("_bucket", {**labels, "le": le}, cumulative))
+                phase_samples.append(("_count", labels, cumulative))
+                phase_samples.append(("_sum", labels, metrics.histogram_sums[phase]))
+        self._family(lines, "phase_duration_seconds", "histogram",
+                     "Duration of each acquisition phase.", phase_samples)
+
+        memory = psutil.virtual_memory()
+        self._family(lines, "host_memory_available_bytes", "gauge",
+                     "Memory available on the host.", [("", {}, memory.available)])
+        self._family(lines, "host_memory_used_ratio", "gauge",
+                     "Fraction of host memory in use.", [("", {}, memory.percent / 100)])
+        self._family(lines, "process_resident_memory_bytes", "gauge",
+                     "Resident memory of the odin_server process.",
+                     [("", {}, psutil.Process().memory_info().rss)])
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
@@ -3,6 +3,13 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from odin_pico.pico_controller import PicoController
 
+# Durations and sizes that are made positive when set
+NON_NEGATIVE_FIELDS = {
+    "capture_time", "rotate_size_mb", "rotate_time_s", "flush_interval_s",
+    "target_block_s", "max_block_s", "interval_s", "idle_timeout_s", "heartbeat_s",
+    "fit_window_s", "telemetry_interval_s", "max_wait_time",
+}
+
 def get_dc_value(obj, chan_name, attr_name):
     """Retrive values for the live-view settings."""
     try:
@@ -46,7 +53,7 @@ def set_dc_value(ctrl:PicoController, obj, attr_name, value):
         if value < 1:
             value = 1
 
-    if attr_name == "capture_time":
+    if attr_name in NON_NEGATIVE_FIELDS:
         if value <= 0:
             value = value * (-1)
 
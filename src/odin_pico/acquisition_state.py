@@ -0,0 +1,84 @@
+"""Acquisition state machine, fed by a thread-safe command queue."""
+
+import logging
+import queue
+import time
+
+
+class AcquisitionStateMachine:
+    """Serialise capture commands from request threads and the GPIO callback.
+
+    Commands are queued with the state the system was in when they arrived, and
+    are applied by the acquisition thread between captures. Each state lists the
+    commands it accepts, anything else is rejected and reported rather than
+    half-applied. Aborts do not wait in the queue, they set the abort event
+    directly so the capture in progress reacts straight away.
+    """
+
+    STATES = ("idle", "live_view", "listening", "waiting_tec", "capturing", "aborting")
+
+    # Commands accepted when submitted in each state
+    ACCEPTS = {
+        "idle":        {"start", "set_temp", "trigger"},
+        "live_view":   {"start", "set_temp", "trigger"},
+        "listening":   {"set_temp", "trigger"},
+        "waiting_tec": {"trigger"},
+        "capturing":   {"trigger"},
+        "aborting":    {"trigger"},
+    }
+
+    def __init__(self):
+        """Initialise the AcquisitionStateMachine class."""
+        self.state = "idle"
+        self.state_since = time.time()
+        self.commands = queue.Queue()
+        self.handlers = {}
+        self.reject_handlers = {}
+        self.rejected = 0
+        self.last_rejected = ""
+
+    def register(self, command: str, handler, on_reject=None):
+        """
+        Set the function called as handler(value, submitted_state) for a command,
+        and optionally on_reject(value, submitted_state) when it is rejected.
+        """
+        self.handlers[command] = handler
+        if on_reject is not None:
+            self.reject_handlers[command] = on_reject
+
+    def set_state(self, state: str):
+        """Move to a new state."""
+        if state != self.state:
+            self.state = state
+            self.state_since = time.time()
+
+    def submit(self, command: str, value=None):
+        """Queue a command, safe to call from any thread."""
+        self.commands.put((command, value, self.state))
+
+    def process(self):
+        """Apply every queued command, called from the acquisition thread."""
+        while True:
+            try:
+                command, value, submitted_state = self.commands.get_nowait()
+            except queue.Empty:
+                return
+
+            if command not in self.ACCEPTS[submitted_state]:
+                self.rejected += 1
+                self.last_rejected = f"{command} while {submitted_state}"
+                logging.warning("Rejected command %s while %s", command, submitted_state)
+                if command in self.reject_handlers:
+                    self.reject_handlers[command](value, submitted_state)
+                continue
+            self.handlers[command](value, submitted_state)
+
+    def status(self) -> dict:
+        """Return the current state for the parameter tree."""
+        return {
+            "state": self.state,
+            "state_time_s": round(time.time() - self.state_since, 1),
+            "queued": self.commands.qsize(),
+            "rejected": self.rejected,
+            "last_rejected": self.last_rejected,
+        }
@@ -1,18 +1,31 @@
 """Adapter for a PicoScope 5444D."""
 
 import logging
+import os
+import threading
+from functools import partial
 from odin.adapters.adapter import (
     ApiAdapter,
     ApiAdapterResponse,
     request_types,
     response_types,
 )
-from odin.adapters.parameter_tree import ParameterTreeError
+from odin.adapters.parameter_tree import ParameterTree, ParameterTreeError
 from tornado.escape import json_decode
 from odin_pico.pico_controller import PicoController, PicoControllerError
+from odin_pico.pico_device import PicoDevice
+from odin_pico.Utilities.metrics_exporter import MetricsExporter, OPENMETRICS_CONTENT_TYPE
 
 class PicoAdapter(ApiAdapter):
-    """Top level Adapter for Odin Control to interface with a PicoScope 5444D."""
+    """Top level Adapter for Odin Control to interface with one or more PicoScope 5444Ds.
+
+    With the serials option set (a comma separated list, or "auto" to open every
+    connected scope) each scope gets its own controller, served under
+    device/<serial>/..., and writes to a subfolder of the data path named after
+    its serial, and GPIO triggers are received once by the adapter and
+    forwarded to every scope, with a single reply once every listening scope has
+    dealt with them. Without it a single scope is served under device/... as before.
+    """
 
     def __init__(self, **kwargs):
         """Initialise the PicoAdapter Object."""
@@ -21,21 +34,153 @@ class PicoAdapter(ApiAdapter):
         update_loop = self.options.get("background_task_enable", True)
         data_output_path = self.options.get("data_output_path", "/tmp/")
         disk_path = self.options.get("disk_path", "/data/")
+        serials = self.options.get("serials", "")
+        # Acquisition thread placement, e.g. acq_cpu_affinity = 2,3 and acq_nice = -5
+        acq_cpus = [
+            int(cpu) for cpu in str(self.options.get("acq_cpu_affinity", "")).split(",")
+            if cpu.strip()
+        ]
+        thread_options = {
+            "acq_cpus": acq_cpus,
+            "acq_nice": int(self.options.get("acq_nice", 0)),
+            "housekeeping_workers": int(self.options.get("housekeeping_workers", 2)),
+            "analysis_process": bool(int(self.options.get("analysis_process", 0))),
+        }
+
+        if serials == "auto":
+            serials = PicoDevice.enumerate_units()
+            logging.info(f"Found PicoScopes: {serials}")
+        elif serials:
+            serials = [s.strip() for s in serials.split(",") if s.strip()]
+
+        self.multi_scope = bool(serials)
+        if self.multi_scope:
+            self.controllers = {}
+            for serial in serials:
+                # every scope reads the TEC through the first scope's telemetry poller
+                first = next(iter(self.controllers.values()), None)
+                self.controllers[serial] = PicoController(
+                    update_loop, os.path.join(data_output_path, serial, ""), disk_path, serial,
+                    tec_telemetry=first.tec_telemetry if first else None, **thread_options
+                )
+            self.sync_tree = ParameterTree({
+                "scopes": (lambda: list(self.controllers), None),
+                "start": (lambda: None, self.start_synchronised),
+            })
+        else:
+            self.controllers = {
+                "": PicoController(update_loop, data_output_path, disk_path, **thread_options)
+            }
+
+        # The first scope also serves the GPIB tree
+        self.pico_controller = next(iter(self.controllers.values()))
+        # GPIO trigger identity -> scopes yet to deal with it, and whether any captured it
+        self._pending_replies = {}
+        self._reply_lock = threading.Lock()
+        self.reply_method = None
+        self.metrics_exporter = MetricsExporter(self.controllers)
 
-        self.pico_controller = PicoController(update_loop, data_output_path, disk_path)
-   
     def initialize(self, adapters):
         """Initialize the adapter after it has been loaded."""
         self.adapters = dict((k, v) for k, v in adapters.items() if v is not self)
         logging.debug(f"adapters loaded:{self.adapters}")
-        self.pico_controller.initialize_adapters(self.adapters)
+        for controller in self.controllers.values():
+            controller.initialize_adapters(self.adapters, gpio=not self.multi_scope)
+        if self.multi_scope:
+            self._attach_gpio()
+
+    def _attach_gpio(self):
+        """Register once for GPIO triggers on behalf of every scope."""
+        try:
+            trigger_controller = self.adapters["gpio-server"].get_controller()
+            trigger_controller.register_event(self.trigger_received)
+            self.reply_method = trigger_controller.get_reply_method()
+        except Exception:
+            return
+        for serial, controller in self.controllers.items():
+            controller.gpio_config.reply_method = partial(self._scope_done, serial)
+            controller.on_trigger_missed = partial(self._scope_done, serial, captured=False)
+            controller.gpio_config.enabled = True
+
+    def trigger_received(self, identity):
+        """Forward a GPIO trigger to every scope."""
+        listening = {
+            serial for serial, controller in self.controllers.items()
+            if controller.gpio_config.listening
+        }
+        if listening:
+            with self._reply_lock:
+                self._pending_replies[identity] = {"waiting": listening, "captured": False}
+        for controller in self.controllers.values():
+            controller.trigger_received(identity)
+
+    def _scope_done(self, serial, identity, captured=True):
+        """Reply to a trigger once every scope listening for it has captured or missed it."""
+        with self._reply_lock:
+            pending = self._pending_replies.get(identity)
+            if pending is None:
+                return
+            pending["waiting"].discard(serial)
+            pending["captured"] |= captured
+            if pending["waiting"]:
+                return
+            del self._pending_replies[identity]
+        # as with a single scope, a trigger no scope captured gets no reply
+        if pending["captured"]:
+            self.reply_method(identity)
+
+    def start_synchronised(self, _=None):
+        """Start a user capture on every scope, arming their first blocks together."""
+        barrier = threading.Barrier(len(self.controllers))
+        for controller in self.controllers.values():
+            controller.pico.start_barrier = barrier
+            controller.request_start(True)
+
+    def _route(self, path):
+        """Return the controller for a request path, and the path within its tree."""
+        parts = path.strip("/").split("/")
+        if self.multi_scope and parts[0] == "device" and len(parts) > 1:
+            if parts[1] not in self.controllers:
+                raise ParameterTreeError(f"Invalid path: {path}")
+            return self.controllers[parts[1]], "/".join(["device"] + parts[2:])
+        return self.pico_controller, path
+
+    def _get_all(self, path):
+        """Get the whole tree, or all devices, of a multi-scope adapter."""
+        devices = {
+            serial: controller.get("device")["device"]
+            for serial, controller in self.controllers.items()
+        }
+        if path.strip("/") == "device":
+            return {"device": devices}
+        return {
+            "device": devices,
+            "gpib": self.pico_controller.get("gpib")["gpib"],
+            "sync": self.sync_tree.get(""),
+        }
 
-    @response_types("application/json", default="application/json")
     def get(self, path, request):
-        """Handle a HTTP GET request."""
+        """Handle a HTTP GET request, serving the OpenMetrics endpoint outside of the tree."""
+        if path.strip("/") == "metrics":
+            return ApiAdapterResponse(
+                self.metrics_exporter.render(),
+                content_type=OPENMETRICS_CONTENT_TYPE,
+                status_code=200
+            )
+        return self.get_tree(path, request)
+
+    @response_types("application/json", default="application/json")
+    def get_tree(self, path, request):
+        """Handle a HTTP GET request on the parameter tree."""
         try:
             # Send the get request to the controller
-            response = self.pico_controller.get(path)
+            if self.multi_scope and path.strip("/") in ("", "device"):
+                response = self._get_all(path)
+            elif self.multi_scope and path.strip("/").startswith("sync"):
+                response = self.sync_tree.get(path.strip("/")[len("sync"):].lstrip("/"))
+            else:
+                controller, sub_path = self._route(path)
+                response = controller.get(sub_path)
             status_code = 200
         except ParameterTreeError as e:
             response = {"error": str(e)}
@@ -58,10 +203,16 @@ class PicoAdapter(ApiAdapter):
         try:
             # Send the set request to the controller
             data = json_decode(request.body)
-            self.pico_controller.set(path, data)
-            response = self.pico_controller.get(path)
+            if self.multi_scope and path.strip("/").startswith("sync"):
+                sub_path = path.strip("/")[len("sync"):].lstrip("/")
+                self.sync_tree.set(sub_path, data)
+                response = self.sync_tree.get(sub_path)
+            else:
+                controller, sub_path = self._route(path)
+                controller.set(sub_path, data)
+                response = controller.get(sub_path)
             status_code = 200
-        except PicoControllerError as e:
+        except (PicoControllerError, ParameterTreeError) as e:
             response = {"error": str(e)}
             status_code = 400
         except (TypeError, ValueError) as e:
@@ -81,4 +232,5 @@ class PicoAdapter(ApiAdapter):
 
     def cleanup(self):
         """Clean up adapter state at shutdown."""
-        self.pico_controller.cleanup()
+        for controller in self.controllers.values():
+            controller.cleanup()
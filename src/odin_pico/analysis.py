@@ -3,9 +3,10 @@
 import logging
 import numpy as np
 
-from odin_pico.buffer_manager import BufferManager
+from odin_pico.buffer_manager import BufferManager, LIST_MODE_DTYPE
 from odin_pico.DataClasses.pico_config import DeviceConfig
 from odin_pico.DataClasses.pico_status import DeviceStatus
+from odin_pico.metrics import AcquisitionMetrics
 
 
 class PicoAnalysis:
@@ -20,14 +21,44 @@ class PicoAnalysis:
         dev_conf=DeviceConfig(),
         buffer_manager=BufferManager(),
         pico_status=DeviceStatus(),
+        metrics=None,
     ):
         """Initialise PicoAnalysis class."""
         self.dev_conf = dev_conf
         self.buffer_manager = buffer_manager
         self.pico_status = pico_status
+        self.metrics = metrics or AcquisitionMetrics()
+
+    @staticmethod
+    def extract_peaks(captures, mode="max", pre_trig_samples=0):
+        """
+        Return one peak height per capture (row) of a 2D array of ADC counts.
+
+        :param captures : numpy.ndarray of shape (n_captures, samples)
+        :param mode : "max" for the raw maximum, "baseline" to subtract the mean of the
+            pre-trigger samples from the maximum
+        :param pre_trig_samples : number of pre-trigger samples, used by "baseline" mode
+        """
+        peaks = captures.max(axis=1)
+        if mode == "baseline":
+            baseline = captures[:, :max(1, pre_trig_samples)].mean(axis=1)
+            peaks = peaks - baseline
+        elif mode != "max":
+            raise ValueError(f"Unknown peak extraction mode: {mode}")
+        return peaks
+
+    @staticmethod
+    def histogram_peaks(peak_values, num_bins, lower_range, upper_range):
+        """Histogram peak heights into num_bins between lower_range and upper_range."""
+        return np.histogram(peak_values, bins=num_bins, range=(lower_range, upper_range))
 
     def pha_one_peak(self):
         """Analysis function - generates peak height distributions."""
+        with self.metrics.span("pha"):
+            self._pha_one_peak()
+
+    def _pha_one_peak(self):
+        """Accumulate the PHA of every channel that has PHA toggled."""
 
         # Check if user has requested PHA counts to be cleared
         if self.dev_conf.pha.clear_pha:
@@ -57,18 +88,53 @@ class PicoAnalysis:
         ch_idx = self.buffer_manager.active_channels.index(channel)
         captures = self.buffer_manager.np_channel_arrays[ch_idx]
 
+        # Hand the histogramming to the analysis worker, unless list mode needs the peaks here
+        pha = self.dev_conf.pha
+        worker = self.buffer_manager.analysis_worker
+        if worker is not None and not self.buffer_manager.list_mode_active and worker.submit_pha(
+                captures, self.buffer_manager.pha_counts, channel,
+                pha.num_bins, pha.lower_range, pha.upper_range):
+            self.buffer_manager.bin_edges = np.histogram_bin_edges(
+                [], bins=pha.num_bins, range=(pha.lower_range, pha.upper_range))[:-1]
+            return
+
         # Find peak value in each capture
-        peak_values = captures.max(axis=1)
+        peak_values = self.extract_peaks(captures)
 
         # Histogram the counts against the bin_edges, within user defined ranges
-        counts, bin_edges = np.histogram(
+        counts, bin_edges = self.histogram_peaks(
             peak_values,
-            bins=self.dev_conf.pha.num_bins,
-            range=(self.dev_conf.pha.lower_range, self.dev_conf.pha.upper_range),
+            self.dev_conf.pha.num_bins,
+            self.dev_conf.pha.lower_range,
+            self.dev_conf.pha.upper_range,
         )
 
         # set bin edges
         self.buffer_manager.bin_edges = bin_edges[:-1]
         
         # Accumulate counts 
-        self.buffer_manager.accumulate_pha(channel, counts)
\ No newline at end of file
+        self.buffer_manager.accumulate_pha(channel, counts)
+
+        if self.buffer_manager.list_mode_active:
+            self.record_list_mode(channel, captures, peak_values)
+
+    def record_list_mode(self, channel, captures, peak_values):
+        """Build one list-mode record for every capture retrieved in the latest run."""
+        stamps = self.buffer_manager.last_trigger_stamps
+        start = self.buffer_manager.run_row_offset
+        stop = min(start + len(stamps), captures.shape[0])
+        n_caps = stop - start
+        if n_caps <= 0:
+            return
+
+        # Baseline is the mean of the pre-trigger samples, or the first sample if there are none
+        pre_trig = max(1, self.dev_conf.capture.pre_trig_samples)
+        overflow = np.ctypeslib.as_array(self.buffer_manager.overflow)[:n_caps]
+
+        records = np.zeros(n_caps, dtype=LIST_MODE_DTYPE)
+        records["channel"] = channel
+        records["timestamp"] = stamps[:n_caps]
+        records["peak_height"] = peak_values[start:stop]
+        records["baseline"] = captures[start:stop, :pre_trig].mean(axis=1)
+        records["overflow"] = (overflow >> channel) & 1
+        self.buffer_manager.add_list_mode_records(records)
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""Analysis worker process, histogramming capture buffers held in shared memory."""
+
+import logging
+import multiprocessing as mp
+import queue
+import threading
+import time
+from collections import Counter, deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from odin_pico.analysis import PicoAnalysis
+
+
+def _release_segment(seg, unlink):
+    """Close a segment, it stays mapped while arrays still reference it."""
+    try:
+        seg.close()
+    except BufferError:
+        pass
+    if unlink:
+        try:
+            seg.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _pha_job(attach, captures_desc, counts_desc, chan, num_bins, lower_range, upper_range):
+    """Add the PHA of one channel's captures to the shared counts."""
+    captures = np.ndarray(buffer=attach(captures_desc[0]).buf, **captures_desc[1])
+    counts = np.ndarray(buffer=attach(counts_desc[0]).buf, **counts_desc[1])
+    peaks = PicoAnalysis.extract_peaks(captures)
+    counts[chan] += PicoAnalysis.histogram_peaks(peaks, num_bins, lower_range, upper_range)[0]
+
+
+def _worker_main(jobs, done):
+    """Entry point of the analysis process, runs queued jobs until sent None."""
+    segments = {}
+
+    def attach(name):
+        if name not in segments:
+            segments[name] = shared_memory.SharedMemory(name=name)
+        return segments[name]
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        if job[0] == "forget":
+            for name in job[1]:
+                if name in segments:
+                    _release_segment(segments.pop(name), unlink=False)
+            continue
+        try:
+            _pha_job(attach, *job[1:])
+            done.put(None)
+        except Exception as e:
+            done.put(f"{type(e).__name__}: {e}")
+
+    for seg in segments.values():
+        _release_segment(seg, unlink=False)
+
+
+class AnalysisWorker:
+    """Run the PHA of each block in a separate process, reading the buffers through shared memory.
+
+    Capture buffers and PHA counts are allocated here, in shared memory segments
+    that are recycled once the buffer manager releases them. The acquisition
+    thread only queues a small descriptor per channel (segment name, shape,
+    histogram settings) and the worker adds its counts straight into the shared
+    counts array, so the histogramming does not compete for the GIL with the
+    capture loop and request handling. Jobs are applied in order, a segment is
+    only reused once every job reading it has completed.
+    """
+
+    def __init__(self, name="odin_pico_analysis", max_free=16):
+        """Initialise the AnalysisWorker class and start its process."""
+        self.max_free = max_free
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.last_error = ""
+        self.disabled = False
+
+        self._lock = threading.Lock()
+        self._in_use = {}           # segment name -> (address, segment)
+        self._free = []             # segments ready to be reused
+        self._releasing = set()     # released segments still read by a queued job
+        self._reading = Counter()   # segment name -> queued jobs reading it
+        self._inflight = deque()    # segment names read by each queued job, in order
+        self._forget = []           # unlinked segments the worker may still have attached
+
+        ctx = mp.get_context("spawn")
+        self.jobs = ctx.Queue()
+        self.done = ctx.Queue()
+        self.process = ctx.Process(
+            target=_worker_main, args=(self.jobs, self.done), name=name, daemon=True
+        )
+        self.process.start()
+        logging.info("Started analysis worker process %s", self.process.pid)
+
+    @property
+    def alive(self) -> bool:
+        return not self.disabled and self.process.is_alive()
+
+    def zeros(self, shape, dtype=np.int16) -> np.ndarray:
+        """Return a zeroed array in a shared memory segment, reusing a released one if it fits."""
+        dtype = np.dtype(dtype)
+        nbytes = max(int(np.prod(shape)) * dtype.itemsize, 1)
+        with self._lock:
+            fits = [seg for seg in self._free if nbytes <= seg.size <= 2 * nbytes]
+            if fits:
+                seg = min(fits, key=lambda s: s.size)
+                self._free.remove(seg)
+            else:
+                seg = shared_memory.SharedMemory(create=True, size=nbytes)
+            arr = np.ndarray(shape, dtype=dtype, buffer=seg.buf)
+            arr.fill(0)
+            self._in_use[seg.name] = (arr.ctypes.data, seg)
+        return arr
+
+    def _locate(self, arr):
+        """Return the segment name and offset of an array, None if it is not in shared memory."""
+        address = arr.ctypes.data
+        for name, (start, seg) in self._in_use.items():
+            if start <= address < start + seg.size:
+                return name, address - start
+        return None
+
+    def _descriptor(self, arr):
+        """Describe an array so the worker can map it, None if it is not in shared memory."""
+        location = self._locate(arr)
+        if location is None:
+            return None
+        name, offset = location
+        return name, {"shape": arr.shape, "dtype": arr.dtype.str, "offset": offset,
+                      "strides": arr.strides}
+
+    def release(self, arrays):
+        """Return the segments of arrays the buffer manager has finished with."""
+        with self._lock:
+            for arr in arrays:
+                location = self._locate(arr)
+                if location is None or location[0] in self._releasing:
+                    continue
+                if self._reading[location[0]]:
+                    self._releasing.add(location[0])
+                else:
+                    self._recycle(location[0])
+
+    def _recycle(self, name):
+        """Move a segment to the free list, unlinking the oldest free one when it is full."""
+        _, seg = self._in_use.pop(name)
+        self._free.append(seg)
+        while len(self._free) > self.max_free:
+            old = self._free.pop(0)
+            self._forget.append(old.name)
+            _release_segment(old, unlink=True)
+
+    def submit_pha(self, captures, counts, chan, num_bins, lower_range, upper_range) -> bool:
+        """Queue the PHA of one channel, returns False if it has to be done in process."""
+        if not self.alive:
+            return False
+        self.poll()
+        with self._lock:
+            captures_desc = self._descriptor(captures)
+            counts_desc = self._descriptor(counts)
+            if captures_desc is None or counts_desc is None:
+                return False
+            if self._forget:
+                self.jobs.put(("forget", self._forget))
+                self._forget = []
+            names = (captures_desc[0], counts_desc[0])
+            self._reading.update(names)
+            self._inflight.append(names)
+        self.jobs.put(("pha", captures_desc, counts_desc, chan, num_bins, lower_range, upper_range))
+        self.submitted += 1
+        return True
+
+    def _job_done(self, error):
+        """Account for a completed job, recycling segments no longer read by any job."""
+        self.completed += 1
+        if error:
+            self.failed += 1
+            self.last_error = error
+            logging.error("Analysis worker job failed: %s", error)
+        with self._lock:
+            for name in self._inflight.popleft():
+                self._reading[name] -= 1
+                if not self._reading[name]:
+                    del self._reading[name]
+                    if name in self._releasing:
+                        self._releasing.discard(name)
+                        self._recycle(name)
+
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    def poll(self):
+        """Account for every job completed so far, without blocking."""
+        while self._inflight:
+            try:
+                error = self.done.get_nowait()
+            except queue.Empty:
+                return
+            self._job_done(error)
+
+    def wait_idle(self, timeout=10.0) -> bool:
+        """Block until every queued job has been applied to the shared counts."""
+        deadline = time.monotonic() + timeout
+        while self._inflight:
+            try:
+                self._job_done(self.done.get(timeout=0.1))
+            except queue.Empty:
+                if not self.alive or time.monotonic() > deadline:
+                    logging.error("Analysis worker not responding, %d PHA jobs lost, "
+                                  "PHA continues in process", len(self._inflight))
+                    self.disabled = True
+                    with self._lock:
+                        self._inflight.clear()
+                        self._reading.clear()
+                        for name in self._releasing:
+                            self._recycle(name)
+                        self._releasing.clear()
+                    return False
+        return True
+
+    def status(self) -> dict:
+        """Return the worker state for the parameter tree."""
+        with self._lock:
+            segments = [seg for _, seg in self._in_use.values()] + self._free
+        return {
+            "alive": self.alive,
+            "pid": self.process.pid or 0,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "pending": self.pending(),
+            "last_error": self.last_error,
+            "shared_segments": len(segments),
+            "shared_bytes": sum(seg.size for seg in segments),
+        }
+
+    def stop(self):
+        """Stop the worker process and unlink every shared memory segment."""
+        if self.process.is_alive():
+            if self.alive:
+                self.wait_idle(timeout=2.0)
+            self.jobs.put(None)
+            self.process.join(timeout=5)
+            if self.process.is_alive():
+                self.process.terminate()
+        with self._lock:
+            for _, seg in self._in_use.values():
+                _release_segment(seg, unlink=True)
+            for seg in self._free:
+                _release_segment(seg, unlink=True)
+            self._in_use.clear()
+            self._free.clear()
@@ -2,20 +2,33 @@
 
 import ctypes
 import logging
-from collections import deque
 from typing import List
 import numpy as np
 from odin_pico.DataClasses.pico_config import DeviceConfig
+from odin_pico.trigger_rate import TriggerRateEstimator
 from odin_pico.Utilities.pico_util import PicoUtil
 import psutil
 import math
 
+# One record per capture, per channel, for list-mode output
+LIST_MODE_DTYPE = np.dtype([
+    ("channel", np.uint8),
+    ("timestamp", np.float64),
+    ("peak_height", np.int16),
+    ("baseline", np.float32),
+    ("overflow", np.bool_),
+])
+
 class BufferManager:
     """Class which manages the buffers that are filled with data by the PicoScope."""
 
-    def __init__(self, dev_conf=DeviceConfig()):
-        """Initialise the BufferManager Class."""
+    def __init__(self, dev_conf=DeviceConfig(), analysis_worker=None):
+        """
+        Initialise the BufferManager Class. With an analysis worker, capture buffers
+        and PHA counts are allocated in its shared memory so it can histogram them.
+        """
         self.dev_conf = dev_conf
+        self.analysis_worker = analysis_worker
         self.util = PicoUtil()
         self.channels = [
             getattr(self.dev_conf, f"channel_{name}")
@@ -28,7 +41,20 @@ class BufferManager:
         self.trigger_times = []
         self.capture_blocks: List[List[np.ndarray]] = []
         self.trigger_blocks:  List[np.ndarray]   = []
-        self.trigger_intervals = deque(maxlen=500)
+        self.trigger_rate = TriggerRateEstimator()
+
+        # Trigger time stamps (s) of the latest run and list-mode records built from them
+        self.last_trigger_stamps = np.zeros(0, dtype=np.float64)
+        # Wall clock time the stamps count from, and when the latest block stopped
+        self.run_t0 = None
+        self.run_t1 = None
+        # Largest uncertainty (s) of a block's first trigger time in the run, and
+        # segments whose trigger info was unusable or whose counter was reset
+        self.stamp_uncertainty_s = 0.0
+        self.invalid_trigger_info = 0
+        self.run_row_offset = 0
+        self.list_mode_active = False
+        self.list_mode_blocks: List[np.ndarray] = []
 
         self.lv_channel_arrays = []
         self.lv_channels_active = []
@@ -36,10 +62,26 @@ class BufferManager:
         self.pha_channels_active = [False] * 4
         self.pha_active_channels = []
         self.bin_edges = []
-        self.pha_counts = np.zeros((len(self.dev_conf.channel_names), 
-                                    self.dev_conf.pha.num_bins), dtype=np.int64)
+        self.pha_counts = self._zeros((len(self.dev_conf.channel_names),
+                                       self.dev_conf.pha.num_bins), np.int64)
         self.bin_edges = np.zeros(self.dev_conf.pha.num_bins, dtype=np.float64)
 
+    def _zeros(self, shape, dtype):
+        """Allocate a buffer, in shared memory when an analysis worker is running."""
+        if self.analysis_worker is not None:
+            return self.analysis_worker.zeros(shape, dtype)
+        return np.zeros(shape, dtype=dtype)
+
+    def _release(self, arrays):
+        """Hand shared memory buffers that are no longer needed back to the analysis worker."""
+        if self.analysis_worker is not None and arrays:
+            self.analysis_worker.release(arrays)
+
+    def wait_for_analysis(self):
+        """Wait until PHA queued to the analysis worker has been added to pha_counts."""
+        if self.analysis_worker is not None and self.analysis_worker.alive:
+            self.analysis_worker.wait_idle()
+
     def estimate_max_time(self):
         """
         Return estimated seconds of acquisition that can still fit into RAM,
@@ -65,17 +107,15 @@ class BufferManager:
         return math.trunc(max_caps * (capture_dur + self.avg_trigger_dt()))
 
     def add_trigger_intervals(self, deltas):
-        """Append trigger timing values to the deque."""
+        """Add trigger timing values to the rate estimator."""
         if deltas is None or len(deltas) == 0:
             return
         # skip first element of trigger intervals, from looking at trigger data, it seems to be inaccurate
-        self.trigger_intervals.extend(deltas[1:] if len(deltas) > 1 else deltas)
+        self.trigger_rate.add_intervals(deltas[1:] if len(deltas) > 1 else deltas)
         
     def avg_trigger_dt(self):
-        """Mean of stored intervals; returns 0 if deque empty."""
-        if not self.trigger_intervals:
-            return 0
-        return sum(self.trigger_intervals) / len(self.trigger_intervals)
+        """Mean of the last 500 intervals; returns 0 if none have been stored."""
+        return self.trigger_rate.avg_dt
 
     def generate_arrays(self, *args):
         """Create the buffers that the picoscope will be mapped onto for data collection."""
@@ -92,7 +132,7 @@ class BufferManager:
 
         for i in range(len(self.active_channels)):
             #logging.debug(f"Creating array for channel for {i}")
-            self.np_channel_arrays.append(np.zeros(shape=(n_captures, samples), dtype=np.int16))
+            self.np_channel_arrays.append(self._zeros((n_captures, samples), np.int16))
 
     def accumulate_pha(self, chan, counts):
         """Add the new PHA data to the previous data, if there is any data."""
@@ -166,7 +206,7 @@ class BufferManager:
         )
 
         block = [
-            np.zeros((caps_in_run, samples_per_cap), dtype=np.int16)
+            self._zeros((caps_in_run, samples_per_cap), np.int16)
             for _ in self.active_channels
         ]
         self.capture_blocks.append(block)
@@ -196,8 +236,34 @@ class BufferManager:
         self.trigger_blocks[block_idx] = \
             self.trigger_blocks[block_idx][:seg_caps]
 
+    def add_list_mode_records(self, records: np.ndarray):
+        """Store a set of list-mode records produced by the PHA stage."""
+        self.list_mode_blocks.append(records)
+
+    def list_mode_records(self) -> np.ndarray:
+        """Return every list-mode record held in memory as a single array."""
+        if not self.list_mode_blocks:
+            return np.zeros(0, dtype=LIST_MODE_DTYPE)
+        return np.concatenate(self.list_mode_blocks)
+
+    def release_blocks(self, n_blocks: int = None, list_mode: bool = True):
+        """
+        Drop the accumulated time-based blocks once they have been written to disk,
+        or only the first n_blocks, and the list-mode records unless list_mode is False.
+        """
+        if n_blocks is None:
+            n_blocks = len(self.capture_blocks)
+        self._release([arr for block in self.capture_blocks[:n_blocks] for arr in block])
+        self.capture_blocks: List[List[np.ndarray]] = self.capture_blocks[n_blocks:]
+        self.trigger_blocks:  List[np.ndarray]   = self.trigger_blocks[n_blocks:]
+        if list_mode:
+            self.list_mode_blocks: List[np.ndarray] = []
+
     def clear_arrays(self):
         """Remove previously created buffers from the buffer_manager."""
+        self._release(
+            self.np_channel_arrays + [arr for block in self.capture_blocks for arr in block]
+        )
         arrays = [
             self.active_channels,
             self.trigger_times,
@@ -209,12 +275,14 @@ class BufferManager:
             array.clear()
         self.capture_blocks: List[List[np.ndarray]] = []
         self.trigger_blocks:  List[np.ndarray]   = []
+        self.list_mode_blocks: List[np.ndarray] = []
+        self.last_trigger_stamps = np.zeros(0, dtype=np.float64)
         self.pha_channels_active = [False] * 4
 
     def reset_pha(self):
         """Reset PHA counts array based on current channel count and bin settings."""
-        self.pha_counts = np.zeros(
-            (len(self.dev_conf.channel_names), self.dev_conf.pha.num_bins), 
-            dtype=np.int64
+        self._release([self.pha_counts])
+        self.pha_counts = self._zeros(
+            (len(self.dev_conf.channel_names), self.dev_conf.pha.num_bins), np.int64
         )
         self.bin_edges = np.zeros(self.dev_conf.pha.num_bins, dtype=np.float64)
\ No newline at end of file
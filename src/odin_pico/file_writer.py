@@ -8,13 +8,16 @@ import math
 import os
 from pathlib import Path
 import shutil
+import time
 
 import h5py
 import numpy as np
 
-from odin_pico.buffer_manager import BufferManager
+from odin_pico.buffer_manager import BufferManager, LIST_MODE_DTYPE
 from odin_pico.DataClasses.pico_config import DeviceConfig
 from odin_pico.DataClasses.pico_status import DeviceStatus
+from odin_pico.metrics import AcquisitionMetrics
+from odin_pico.tec_telemetry import TecTelemetry, TELEMETRY_DTYPE
 from odin_pico.Utilities.pico_util import PicoUtil
 
 
@@ -27,16 +30,42 @@ class FileWriter:
         dev_conf: DeviceConfig = DeviceConfig(),
         buffer_manager: BufferManager = BufferManager(),
         pico_status: DeviceStatus = DeviceStatus(),
+        metrics: AcquisitionMetrics = None,
+        tec_telemetry: TecTelemetry = None,
     ):
         self.dev_conf = dev_conf
+        self.tec_telemetry = tec_telemetry
         self.buffer_manager = buffer_manager
         self.pico_status = pico_status
+        self.metrics = metrics or AcquisitionMetrics()
         self.util = PicoUtil()
         self.file_error = False
         self.disk_path = disk 
         self.calc_disk_space()
         self.file_times = []
 
+        # Streaming state for time-based captures (part-file rotation and SWMR)
+        self.stream_active = False
+        self.rotation_active = False
+        self.swmr_active = False
+        self._stream = None
+
+        # Open file shared by every trigger / repeat of a run in consolidated mode
+        self._consolidated = None
+        self._consolidated_fname = ""
+
+        # Cached write speed of each destination folder, {folder: (time measured, MB/s)}
+        self._disk_bench = {}
+        self.part_files = []
+        self._part_start = 0.0
+
+        self.channel_key = {
+            0: "channel_a",
+            1: "channel_b",
+            2: "channel_c",
+            3: "channel_d",
+        }
+
     def check_file_name(self) -> bool:
         """Check file name settings are valid, return True when a new file can safely be created."""
 
@@ -59,6 +88,10 @@ class FileWriter:
             self._build_filename()
         )
 
+        # The consolidated file of the current run is expected to exist
+        if self._consolidated is not None and full_path == self._consolidated_fname:
+            return True
+
         root, ext = os.path.splitext(full_path)
         pattern = f"{root}_*{ext}"
         # if os.path.isfile(full_path) or os.path.isfile(f"{root}_1{ext}"):
@@ -74,33 +107,75 @@ class FileWriter:
         logging.debug("true")
         return True
     
-    def _build_filename(self):
+    def _build_filename(self, run_suffixes: bool = None):
         """
-        create <base><temp><repeat>.hdf5
+        create <base><temp><trig><repeat>.hdf5, the trigger and repeat suffixes
+        are left out in consolidated mode as every capture shares one file
         """
+        if run_suffixes is None:
+            run_suffixes = not self.dev_conf.file.consolidate
+
         base = self.dev_conf.file.file_name
         if base.endswith(".hdf5"):
             base = base[:-5]
 
         if self.dev_conf.file.temp_suffix:
             base += self.dev_conf.file.temp_suffix
+        if run_suffixes:
+            if self.dev_conf.file.trig_suffix:
+                base += self.dev_conf.file.trig_suffix
+            if self.dev_conf.file.repeat_suffix:
+                base += self.dev_conf.file.repeat_suffix
+        return base + ".hdf5"
+
+    def _full_path(self, run_suffixes: bool = None) -> str:
+        """Return the full path of the file the current capture is written to."""
+        return (
+            self.dev_conf.file.file_path
+            + self.dev_conf.file.folder_name
+            + self._build_filename(run_suffixes)
+        )
+
+    def _consolidated_group_name(self) -> str:
+        """Return the group for the current capture, e.g. trigger_0001, repeat_2 or both."""
+        name = []
         if self.dev_conf.file.trig_suffix:
-            base += self.dev_conf.file.trig_suffix
+            name.append("trigger" + self.dev_conf.file.trig_suffix)
         if self.dev_conf.file.repeat_suffix:
-            base += self.dev_conf.file.repeat_suffix
-        return base + ".hdf5"
+            name.append("repeat" + self.dev_conf.file.repeat_suffix)
+        return "_".join(name)
 
-    def write_hdf5(self, write_accumulated: bool = False):
+    def _open_consolidated(self, fname: str):
         """
-        Create and write to a hdf5 file.
-        ----------
-        write_accumulated
-            False - normal capture of N waveforms.
-            True  - time-based capture.
+        Return the open consolidated file for fname, creating it and writing the
+        run metadata once when the run (or temperature point) starts.
         """
+        if self._consolidated is not None and self._consolidated_fname != fname:
+            self.close_consolidated()
+
+        if self._consolidated is None:
+            logging.debug(f"opening consolidated file {fname}")
+            self._consolidated = h5py.File(fname, "w")
+            self._consolidated_fname = fname
+            self._write_metadata(self._consolidated)
+        return self._consolidated
+
+    def close_consolidated(self):
+        """Close the consolidated file at the end of a GPIO or repeat run."""
+        if self._consolidated is None:
+            return
+        try:
+            self._consolidated.close()
+        except Exception as e:
+            logging.error(f"Exception while closing consolidated HDF5 file: {e}")
+            self.dev_conf.file.last_write_success = False
+            self.metrics.count("write_failures")
+        self._consolidated = None
+        self._consolidated_fname = ""
 
-        # build metadata dictionary from channel information
-        metadata = self.util.flatten_metadata_dict(
+    def _build_metadata(self) -> dict:
+        """Build the flattened metadata dictionary from channel information."""
+        return self.util.flatten_metadata_dict(
             {
                 "active_channels": self.buffer_manager.active_channels[:],
                 "channel_a": self.dev_conf.channel_a.custom_asdict(),
@@ -113,88 +188,210 @@ class FileWriter:
             }
         )
 
-        channel_key = {
-            0: "channel_a",
-            1: "channel_b",
-            2: "channel_c",
-            3: "channel_d",
-        }
-        
-        pha_toggled_channels = [
-            chan for chan in self.buffer_manager.active_channels
-            if getattr(self.dev_conf, channel_key[chan]).PHAToggled
-        ]
-        waveform_toggled_channels = [
+    def _toggled_channels(self, attr: str) -> list:
+        """Return the active channels that have the given toggle enabled."""
+        return [
             chan for chan in self.buffer_manager.active_channels
-            if getattr(self.dev_conf, channel_key[chan]).waveformsToggled
+            if getattr(getattr(self.dev_conf, self.channel_key[chan]), attr)
         ]
 
-        fname = (
-                self.dev_conf.file.file_path
-                + self.dev_conf.file.folder_name
-                + self._build_filename()
-                )
-        self.dev_conf.file.curr_file_name = fname
-        logging.debug(f"writing to {fname}")
+    def _write_metadata(self, f):
+        """Create the metadata group and populate it with the capture settings."""
+        meta = f.create_group("metadata")
+        for k, v in self._build_metadata().items():
+            meta.attrs[k] = v
+
+        self._write_tec_attrs(meta)
+        self._write_live_time_attrs(meta)
+        return meta
+
+    def _write_tec_attrs(self, obj):
+        """Store the last TEC set point, measurement and how it settled, when a TEC has been used."""
+        if hasattr(self.buffer_manager, "temp_set_last"):
+            obj.attrs["tec_set_C"] = self.buffer_manager.temp_set_last
+        if hasattr(self.buffer_manager, "temp_meas_last"):
+            obj.attrs["tec_meas_C"] = self.buffer_manager.temp_meas_last
+        if hasattr(self.buffer_manager, "temp_settled_by"):
+            obj.attrs["tec_settled_by"] = self.buffer_manager.temp_settled_by
+
+    def _tec_telemetry_rows(self):
+        """Return the TEC telemetry of the current run, None without a running poller or a run."""
+        if (self.tec_telemetry is None or not self.tec_telemetry.running or
+                self.buffer_manager.run_t0 is None):
+            return None
+        return self.tec_telemetry.history(self.buffer_manager.run_t0, self.buffer_manager.run_t1)
+
+    def _tec_telemetry_attrs(self, dset):
+        """Describe the time column of a TEC telemetry table."""
+        dset.attrs["time_units"] = "s"
+        dset.attrs["time_origin"] = "run_t0, the origin of the trigger time stamps"
+        dset.attrs["run_t0"] = self.buffer_manager.run_t0
+        dset.attrs["temperature_units"] = "C"
+        self._write_stamp_attrs(dset)
+
+    def _write_tec_telemetry(self, f):
+        """Write the TEC samples read during the run as a table on the trigger time stamp clock."""
+        rows = self._tec_telemetry_rows()
+        if rows is None:
+            return
+        dset = f.create_dataset("tec_telemetry", data=rows)
+        self._tec_telemetry_attrs(dset)
 
+    def _write_stamp_attrs(self, obj):
+        """
+        Store how well the trigger time stamps are placed on the run clock: each
+        block's first trigger is only known to within stamp_uncertainty_s, and
+        invalid_trigger_info segments have NaN stamps or follow a counter reset.
+        """
+        attrs = {
+            "stamp_uncertainty_s": self.buffer_manager.stamp_uncertainty_s,
+            "invalid_trigger_info": self.buffer_manager.invalid_trigger_info,
+        }
+        for k, v in attrs.items():
+            if k in obj.attrs:
+                obj.attrs.modify(k, v)
+            else:
+                obj.attrs[k] = v
+
+    def _write_live_time_attrs(self, obj):
+        """Store the live and dead time of the run, updated in place if already present."""
+        for k, v in self.pico_status.live_time.custom_asdict().items():
+            if f"live_time_{k}" in obj.attrs:
+                obj.attrs.modify(f"live_time_{k}", v)
+            else:
+                obj.attrs[f"live_time_{k}"] = v
+
+    def _write_pha(self, f):
+        """Write the accumulated PHA for every PHA toggled channel."""
+        self.buffer_manager.wait_for_analysis()
+        pha_toggled_channels = self._toggled_channels("PHAToggled")
+        edges = self.buffer_manager.bin_edges
+        for ch_id in self.buffer_manager.active_channels:
+            if ch_id in pha_toggled_channels:
+                counts = self.buffer_manager.pha_counts[ch_id]
+                if len(edges) > 0 and len(edges) == len(counts):
+                    f.create_dataset(f"pha_{ch_id}", data=[edges, counts])
+
+    def _write_list_mode(self, f, fname: str) -> int:
+        """
+        Write the list-mode records held in memory as a compound dataset,
+        and export them to Parquet when requested. Returns the number of records.
+        """
+        if not self.buffer_manager.list_mode_active:
+            return 0
+
+        records = self.buffer_manager.list_mode_records()
+        dset = f.create_dataset("list_mode", data=records)
+        dset.attrs["timestamp_units"] = "s"
+        dset.attrs["peak_height_units"] = "adc_counts"
+        self._write_stamp_attrs(dset)
 
+        if self.dev_conf.file.list_mode_parquet:
+            self.export_parquet(records, fname)
+        return len(records)
+
+    def export_parquet(self, records: np.ndarray, fname: str):
+        """Export list-mode records next to the HDF5 file, requires the optional pyarrow package."""
         try:
-            with h5py.File(fname, "w") as f:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            logging.error("pyarrow is not installed, skipping Parquet export of list-mode data")
+            return
 
-                # Create metadata group
-                meta = f.create_group("metadata")
-                for k, v in metadata.items():
-                    meta.attrs[k] = v
+        table = pa.table({name: records[name] for name in records.dtype.names})
+        pq.write_table(table, os.path.splitext(fname)[0] + ".parquet")
 
-                if hasattr(self.buffer_manager, "temp_set_last"):
-                    meta.attrs["tec_set_C"] = self.buffer_manager.temp_set_last
-                if hasattr(self.buffer_manager, "temp_meas_last"):
-                    meta.attrs["tec_meas_C"] = self.buffer_manager.temp_meas_last
+    def _write_blocks(self, f) -> int:
+        """
+        Copy every accumulated time-based capture block into f.
+        Returns the number of captures written.
+        """
+        waveform_toggled_channels = self._toggled_channels("waveformsToggled")
+        capture_blocks  = self.buffer_manager.capture_blocks
+        trigger_blocks  = self.buffer_manager.trigger_blocks
+        samples_per_cap = capture_blocks[0][0].shape[1]
+        total_captures  = sum(block[0].shape[0] for block in capture_blocks)
+
+        # Create per-channel datasets
+        channel_datasets = {
+            ch_id: f.create_dataset(
+                f"adc_counts_{ch_id}",
+                shape   =(total_captures, samples_per_cap),
+                dtype   =capture_blocks[0][0].dtype
+            )
+            for ch_id in self.buffer_manager.active_channels
+            if ch_id in waveform_toggled_channels
+        }
 
-                if write_accumulated and self.buffer_manager.capture_blocks:
+        # Create trigger_timing datasets
+        trig_dataset = f.create_dataset(
+            "trigger_timings",
+            shape =(total_captures,),
+            dtype =trigger_blocks[0].dtype
+        )
+        # copy each capture block into its position in the dataset
+        next_row = 0  # offset for position in the dataset
 
-                    capture_blocks  = self.buffer_manager.capture_blocks
-                    trigger_blocks  = self.buffer_manager.trigger_blocks
-                    samples_per_cap = capture_blocks[0][0].shape[1]
-                    total_captures  = sum(block[0].shape[0] for block in capture_blocks)
-
-                    # Create per-channel datasets
-                    channel_datasets = {
-                        ch_id: f.create_dataset(
-                            f"adc_counts_{ch_id}",
-                            shape   =(total_captures, samples_per_cap),
-                            dtype   =capture_blocks[0][0].dtype
-                        )
-                        for ch_id in self.buffer_manager.active_channels
-                        if ch_id in waveform_toggled_channels
-                    }
+        for blk_idx, block in enumerate(capture_blocks):
+            seg_caps = block[0].shape[0]  # rows in this block
+            row_slice = slice(next_row, next_row + seg_caps) # Slice the block if captures_completed < size of array
+
+            # write capture for every active channel
+            for chan_arr, ch_id in zip(block, self.buffer_manager.active_channels):
+                if ch_id in waveform_toggled_channels:
+                    channel_datasets[ch_id][row_slice] = chan_arr
+
+            # write corresponding trigger intervals
+            trig_dataset[row_slice] = trigger_blocks[blk_idx]
+            self.metrics.count("bytes_written", trigger_blocks[blk_idx].nbytes + sum(
+                arr.nbytes for arr, ch_id in zip(block, self.buffer_manager.active_channels)
+                if ch_id in waveform_toggled_channels))
+
+            self.pico_status.flags.system_state = (
+                f"Writing HDF5 File: Writing Captures: {math.trunc((row_slice.stop/total_captures)*100)}% completed")
+            logging.debug("Writing HDF5 File: Writing Captures %d-%d out of %d",
+                          row_slice.start + 1, row_slice.stop, total_captures)
+            next_row += seg_caps
 
-                    # Create trigger_timing datasets
-                    trig_dataset = f.create_dataset(
-                        "trigger_timings",
-                        shape =(total_captures,),
-                        dtype =trigger_blocks[0].dtype
-                    )
-                    # copy each capture block into its position in the dataset
-                    next_row = 0  # offset for position in the dataset
-
-                    for blk_idx, block in enumerate(capture_blocks):
-                        seg_caps = block[0].shape[0]  # rows in this block
-                        row_slice = slice(next_row, next_row + seg_caps) # Slice the block if captures_completed < size of array
-
-                        # write capture for every active channel
-                        for chan_arr, ch_id in zip(block, self.buffer_manager.active_channels):
-                            if ch_id in waveform_toggled_channels:
-                                channel_datasets[ch_id][row_slice] = chan_arr
-
-                        # write corresponding trigger intervals
-                        trig_dataset[row_slice] = trigger_blocks[blk_idx]
-
-                        self.pico_status.flags.system_state = (
-                            f"Writing HDF5 File: Writing Captures: {math.trunc((row_slice.stop/total_captures)*100)}% completed")
-                        logging.debug(
-                            f"Writing HDF5 File: Writing Captures {row_slice.start+1}-{row_slice.stop} out of {total_captures}")
-                        next_row += seg_caps
+        return total_captures
+
+    def write_hdf5(self, write_accumulated: bool = False):
+        """
+        Create and write to a hdf5 file.
+        ----------
+        write_accumulated
+            False - normal capture of N waveforms.
+            True  - time-based capture.
+        """
+        with self.metrics.span("hdf5_write"):
+            self._write_hdf5(write_accumulated)
+
+    def _write_hdf5(self, write_accumulated: bool):
+        """Write the current capture to a new file, or a group of the consolidated file."""
+        waveform_toggled_channels = self._toggled_channels("waveformsToggled")
+
+        fname = self._full_path()
+        self.dev_conf.file.curr_file_name = fname
+        group_name = self._consolidated_group_name() if self.dev_conf.file.consolidate else ""
+        logging.debug("writing to %s %s", fname, group_name)
+
+
+        try:
+            if group_name:
+                # Consolidated mode, append this capture as a group of the open run file
+                f = self._open_consolidated(fname).create_group(group_name)
+                f.attrs["written"] = time.time()
+                self._write_tec_attrs(f)
+                self._write_live_time_attrs(f)
+            else:
+                f = h5py.File(fname, "w")
+                # Create metadata group
+                self._write_metadata(f)
+
+            try:
+                if write_accumulated and self.buffer_manager.capture_blocks:
+                    self._write_blocks(f)
                         
                 ## File writing for N captures
                 else:
@@ -203,28 +400,416 @@ class FileWriter:
 
                     for ch_id, data in zip(self.buffer_manager.active_channels, source):
                         if ch_id in waveform_toggled_channels:
-                            logging.debug(f"[HDF5] adc_counts_{ch_id} : {data.shape[0]} captures")
+                            logging.debug("[HDF5] adc_counts_%s : %d captures", ch_id, data.shape[0])
                             f.create_dataset(f"adc_counts_{ch_id}", data=data)
+                            self.metrics.count("bytes_written", data.nbytes)
 
                     f.create_dataset("trigger_timings", data=trigger_times)
 
                 # PHA datasets 
-                edges = self.buffer_manager.bin_edges
-                for ch_id in self.buffer_manager.active_channels:
-                    if ch_id in pha_toggled_channels:
-                        counts = self.buffer_manager.pha_counts[ch_id]
-                        if len(edges) > 0 and len(edges) == len(counts):
-                            f.create_dataset(f"pha_{ch_id}", data=[edges, counts])
+                self._write_pha(f)
+                self._write_tec_telemetry(f)
+                self._write_list_mode(f, self._full_path(run_suffixes=True))
+            finally:
+                if group_name:
+                    f.file.flush()
+                else:
+                    f.close()
                         
             self.dev_conf.file.last_write_success = True
 
         except Exception as e:
             logging.debug(f"Exception while writing HDF5: {e}")
             self.dev_conf.file.last_write_success = False
+            self.metrics.count("write_failures")
             return
 
         self.dev_conf.file.last_write_success = True
 
+    def _part_path(self, index: int) -> str:
+        """Return the path of a numbered part file, e.g. <base>_part0001.hdf5"""
+        root, ext = os.path.splitext(self._full_path(run_suffixes=True))
+        return f"{root}_part{index:04d}{ext}"
+
+    def begin_stream(self):
+        """
+        Prepare for a time-based capture that is written out while it runs.
+        Blocks are either rotated into numbered part files (when a size or time
+        limit is set), appended to an SWMR file as they complete, or both.
+        """
+        self.part_files = []
+        self.dev_conf.file.parts_written = 0
+        self.dev_conf.file.rows_committed = 0
+        self._part_start = time.time()
+        self._stream = None
+        self.rotation_active = (
+            self.dev_conf.file.rotate_enabled and
+            (self.dev_conf.file.rotate_size_mb > 0 or self.dev_conf.file.rotate_time_s > 0)
+        )
+        self.swmr_active = self.dev_conf.file.swmr_enabled
+        self.stream_active = self.rotation_active or self.swmr_active
+
+    def block_completed(self):
+        """
+        Called once a time-based block has completed, appends it to the SWMR file
+        and/or starts a new part file when the size or time limit has been reached.
+        """
+        if not self.stream_active:
+            return
+
+        with self.metrics.span("hdf5_write"):
+            if self.swmr_active:
+                self._append_block()
+
+            if self.rotation_active and self._rotation_due():
+                if self.swmr_active:
+                    self._close_stream()
+                else:
+                    self._write_part()
+
+    def finish_stream(self):
+        """Write any remaining blocks and complete the file, or the master file when rotating."""
+        if self.swmr_active:
+            self._append_block()
+            if self._stream is not None:
+                self._close_stream()
+            elif not self.rotation_active:
+                # no block completed, fall back to writing the (empty) capture in one go
+                self.write_hdf5(write_accumulated=True)
+            else:
+                self._write_master()
+        elif self.buffer_manager.capture_blocks:
+            self._write_part()
+        else:
+            self._write_master()
+        self.stream_active = False
+
+    def _rotation_due(self) -> bool:
+        """Check whether the data held in the current part has reached a rotation limit."""
+        if self.swmr_active:
+            if self._stream is None:
+                return False
+            pending_bytes = self._stream_rows * self._stream_row_bytes
+        else:
+            if not self.buffer_manager.capture_blocks:
+                return False
+            pending_bytes = sum(
+                arr.nbytes for block in self.buffer_manager.capture_blocks for arr in block
+            )
+        size_due = (self.dev_conf.file.rotate_size_mb > 0 and
+                    pending_bytes >= self.dev_conf.file.rotate_size_mb * 1024**2)
+        time_due = (self.dev_conf.file.rotate_time_s > 0 and
+                    (time.time() - self._part_start) >= self.dev_conf.file.rotate_time_s)
+        return size_due or time_due
+
+    def _open_stream(self):
+        """
+        Open the next SWMR file and create resizable datasets for the captures.
+        Every dataset must exist before SWMR mode is switched on, so the PHA
+        datasets are created up front and overwritten on each flush.
+        """
+        fname = (self._part_path(len(self.part_files) + 1) if self.rotation_active
+                 else self._full_path(run_suffixes=True))
+        self.dev_conf.file.curr_file_name = fname
+        logging.debug("opening SWMR file %s", fname)
+
+        samples = (self.dev_conf.capture.pre_trig_samples +
+                   self.dev_conf.capture.post_trig_samples)
+        chunk_rows = max(1, min(self.dev_conf.capture_run.caps_in_run,
+                                (1024**2) // (samples * 2)))
+        waveform_toggled_channels = self._toggled_channels("waveformsToggled")
+
+        f = h5py.File(fname, "w", libver="latest")
+        self._write_metadata(f)
+        self._stream_datasets = {
+            ch_id: f.create_dataset(
+                f"adc_counts_{ch_id}",
+                shape   =(0, samples),
+                maxshape=(None, samples),
+                chunks  =(chunk_rows, samples),
+                dtype   =np.int16
+            )
+            for ch_id in self.buffer_manager.active_channels
+            if ch_id in waveform_toggled_channels
+        }
+        self._stream_trig = f.create_dataset(
+            "trigger_timings",
+            shape   =(0,),
+            maxshape=(None,),
+            chunks  =(chunk_rows,),
+            dtype   =np.float64
+        )
+        self._stream_pha = {
+            ch_id: f.create_dataset(
+                f"pha_{ch_id}",
+                shape=(2, self.dev_conf.pha.num_bins),
+                dtype=np.float64
+            )
+            for ch_id in self._toggled_channels("PHAToggled")
+        }
+        self._stream_tec = None
+        self._stream_tec_last = -np.inf
+        if self._tec_telemetry_rows() is not None:
+            self._stream_tec = f.create_dataset(
+                "tec_telemetry",
+                shape   =(0,),
+                maxshape=(None,),
+                chunks  =(1024,),
+                dtype   =TELEMETRY_DTYPE
+            )
+            self._tec_telemetry_attrs(self._stream_tec)
+        self._stream_lm = None
+        if self.buffer_manager.list_mode_active:
+            self._stream_lm = f.create_dataset(
+                "list_mode",
+                shape   =(0,),
+                maxshape=(None,),
+                chunks  =(4096,),
+                dtype   =LIST_MODE_DTYPE
+            )
+            self._write_stamp_attrs(self._stream_lm)
+        f.swmr_mode = True
+
+        self._stream = f
+        self._stream_fname = fname
+        self._stream_rows = 0
+        self._stream_samples = samples
+        self._stream_row_bytes = samples * 2 * max(1, len(self._stream_datasets))
+        self._last_flush = time.time()
+
+    def _append_block(self):
+        """Append the completed blocks to the SWMR file and release them from memory."""
+        capture_blocks = self.buffer_manager.capture_blocks
+        if not any(block[0].shape[0] for block in capture_blocks):
+            self.buffer_manager.release_blocks()
+            return
+
+        written = 0
+        lm_start = None
+        try:
+            if self._stream is None:
+                self._open_stream()
+
+            for block, trig in zip(capture_blocks, self.buffer_manager.trigger_blocks):
+                rows = block[0].shape[0]
+                start, stop = self._stream_rows, self._stream_rows + rows
+
+                for chan_arr, ch_id in zip(block, self.buffer_manager.active_channels):
+                    if ch_id in self._stream_datasets:
+                        self._stream_datasets[ch_id].resize(stop, axis=0)
+                        self._stream_datasets[ch_id][start:stop] = chan_arr
+
+                self._stream_trig.resize(stop, axis=0)
+                self._stream_trig[start:stop] = trig
+                self._stream_rows = stop
+                written += 1
+                self.metrics.count("bytes_written", trig.nbytes + sum(
+                    arr.nbytes for arr, ch_id in zip(block, self.buffer_manager.active_channels)
+                    if ch_id in self._stream_datasets))
+
+            if self._stream_lm is not None:
+                records = self.buffer_manager.list_mode_records()
+                lm_start = self._stream_lm.shape[0]
+                self._stream_lm.resize(lm_start + len(records), axis=0)
+                self._stream_lm[lm_start:] = records
+                lm_start = None
+
+            self.buffer_manager.release_blocks()
+
+            if (time.time() - self._last_flush) >= self.dev_conf.file.flush_interval_s:
+                self._flush_stream()
+
+        except Exception as e:
+            logging.error(f"Exception while appending to SWMR file: {e}")
+            self.dev_conf.file.last_write_success = False
+            self.metrics.count("write_failures")
+            # blocks already in the file must not be appended again, list-mode records
+            # are kept for the next append unless every one of them was written
+            self.buffer_manager.release_blocks(written, list_mode=False)
+            self._trim_stream(lm_start)
+
+    def _trim_stream(self, lm_rows: int = None):
+        """Drop rows of a failed append beyond the last complete block, and list-mode rows beyond lm_rows."""
+        if self._stream is None:
+            return
+        try:
+            for dset in list(self._stream_datasets.values()) + [self._stream_trig]:
+                if dset.shape[0] > self._stream_rows:
+                    dset.resize(self._stream_rows, axis=0)
+            if lm_rows is not None and self._stream_lm is not None:
+                self._stream_lm.resize(lm_rows, axis=0)
+        except Exception as e:
+            logging.error(f"Could not trim the SWMR file after a failed append: {e}")
+
+    def _flush_stream(self):
+        """Update the PHA datasets and flush, making the new rows visible to readers."""
+        self.buffer_manager.wait_for_analysis()
+        edges = self.buffer_manager.bin_edges
+        for ch_id, dset in self._stream_pha.items():
+            counts = self.buffer_manager.pha_counts[ch_id]
+            if len(edges) == len(counts) == dset.shape[1]:
+                dset[...] = [edges, counts]
+
+        if self._stream_tec is not None:
+            rows = self._tec_telemetry_rows()
+            if rows is not None:
+                rows = rows[rows["time"] > self._stream_tec_last]
+                if len(rows):
+                    start = self._stream_tec.shape[0]
+                    self._stream_tec.resize(start + len(rows), axis=0)
+                    self._stream_tec[start:] = rows
+                    self._stream_tec_last = rows["time"][-1]
+
+        self._stream.flush()
+        self._last_flush = time.time()
+        self.dev_conf.file.rows_committed = (
+            sum(part["rows"] for part in self.part_files) + self._stream_rows
+        )
+
+    def _close_stream(self):
+        """Flush and close the current SWMR file, recording it as a part when rotating."""
+        lm_rows = 0
+        try:
+            self._flush_stream()
+            # SWMR only allows existing attributes to be rewritten in place
+            self._write_live_time_attrs(self._stream["metadata"])
+            for dset in (self._stream_lm, self._stream_tec):
+                if dset is not None:
+                    self._write_stamp_attrs(dset)
+            if self._stream_lm is not None:
+                lm_rows = self._stream_lm.shape[0]
+                if self.dev_conf.file.list_mode_parquet:
+                    self.export_parquet(self._stream_lm[...], self._stream_fname)
+            self.dev_conf.file.last_write_success = True
+        except Exception as e:
+            logging.error(f"Exception while closing SWMR file: {e}")
+            self.dev_conf.file.last_write_success = False
+            self.metrics.count("write_failures")
+        finally:
+            # always release the handle, a file left open stays locked
+            try:
+                self._stream.close()
+            except Exception as e:
+                logging.error(f"Exception while closing SWMR file: {e}")
+                self.dev_conf.file.last_write_success = False
+
+        if self.rotation_active:
+            self.part_files.append({
+                "fname": self._stream_fname,
+                "rows": self._stream_rows,
+                "samples": self._stream_samples,
+                "dtypes": (np.dtype(np.int16), np.dtype(np.float64)),
+                "lm_rows": lm_rows,
+            })
+            self.dev_conf.file.parts_written = len(self.part_files)
+            self._part_start = time.time()
+            self._write_master()
+        self._stream = None
+
+    def _write_part(self):
+        """Write the accumulated blocks to the next part file and release them."""
+        if not any(block[0].shape[0] for block in self.buffer_manager.capture_blocks):
+            # nothing was captured since the last part, no need for an empty file
+            self.buffer_manager.release_blocks()
+            return
+
+        fname = self._part_path(len(self.part_files) + 1)
+        logging.debug("writing part file %s", fname)
+
+        try:
+            with h5py.File(fname, "w") as f:
+                self._write_metadata(f)
+                rows = self._write_blocks(f)
+                lm_rows = self._write_list_mode(f, fname)
+                samples = self.buffer_manager.capture_blocks[0][0].shape[1]
+                dtypes = (self.buffer_manager.capture_blocks[0][0].dtype,
+                          self.buffer_manager.trigger_blocks[0].dtype)
+        except Exception as e:
+            logging.error(f"Exception while writing HDF5 part file: {e}")
+            self.dev_conf.file.last_write_success = False
+            self.metrics.count("write_failures")
+            return
+
+        self.part_files.append({
+            "fname": fname,
+            "rows": rows,
+            "samples": samples,
+            "dtypes": dtypes,
+            "lm_rows": lm_rows,
+        })
+        self.dev_conf.file.parts_written = len(self.part_files)
+        self.dev_conf.file.rows_committed += rows
+        self.buffer_manager.release_blocks()
+        self._part_start = time.time()
+        self._write_master()
+
+    def _write_master(self):
+        """
+        (Re)write the master file, stitching every completed part into single
+        virtual datasets. The master is written to a temporary file and moved
+        into place so readers never open a partially written master.
+        """
+        fname = self._full_path(run_suffixes=True)
+        self.dev_conf.file.curr_file_name = fname
+        tmp_fname = fname + ".tmp"
+
+        waveform_toggled_channels = self._toggled_channels("waveformsToggled")
+        total_rows = sum(part["rows"] for part in self.part_files)
+        total_lm_rows = sum(part["lm_rows"] for part in self.part_files)
+
+        try:
+            with h5py.File(tmp_fname, "w", libver="latest") as f:
+                meta = self._write_metadata(f)
+                meta.attrs["parts"] = [os.path.basename(part["fname"]) for part in self.part_files]
+
+                if self.part_files:
+                    samples = self.part_files[0]["samples"]
+                    adc_dtype, trig_dtype = self.part_files[0]["dtypes"]
+                    layouts = {
+                        f"adc_counts_{ch_id}": h5py.VirtualLayout(
+                            shape=(total_rows, samples), dtype=adc_dtype)
+                        for ch_id in self.buffer_manager.active_channels
+                        if ch_id in waveform_toggled_channels
+                    }
+                    layouts["trigger_timings"] = h5py.VirtualLayout(
+                        shape=(total_rows,), dtype=trig_dtype)
+
+                    next_row = 0
+                    for part in self.part_files:
+                        rows = part["rows"]
+                        # source paths are relative, parts are resolved from the master's folder
+                        source_name = os.path.basename(part["fname"])
+                        for name, layout in layouts.items():
+                            shape = (rows,) if name == "trigger_timings" else (rows, samples)
+                            layout[next_row:next_row + rows] = h5py.VirtualSource(
+                                source_name, name, shape=shape)
+                        next_row += rows
+
+                    for name, layout in layouts.items():
+                        f.create_virtual_dataset(name, layout)
+
+                    if total_lm_rows:
+                        lm_layout = h5py.VirtualLayout(shape=(total_lm_rows,), dtype=LIST_MODE_DTYPE)
+                        next_row = 0
+                        for part in self.part_files:
+                            if part["lm_rows"]:
+                                lm_layout[next_row:next_row + part["lm_rows"]] = h5py.VirtualSource(
+                                    os.path.basename(part["fname"]), "list_mode",
+                                    shape=(part["lm_rows"],))
+                                next_row += part["lm_rows"]
+                        self._write_stamp_attrs(f.create_virtual_dataset("list_mode", lm_layout))
+
+                self._write_pha(f)
+                self._write_tec_telemetry(f)
+
+            os.replace(tmp_fname, fname)
+            self.dev_conf.file.last_write_success = True
+
+        except Exception as e:
+            logging.error(f"Exception while writing HDF5 master file: {e}")
+            self.dev_conf.file.last_write_success = False
+            self.metrics.count("write_failures")
+
     def calc_disk_space(self):
         try:
             path = Path(self.disk_path)
@@ -234,3 +819,58 @@ class FileWriter:
             self.dev_conf.file.available_space = (f"{round(available, 1)}% {usage.free / (1024**3):.1f}GB")
         except FileNotFoundError as e:
             logging.error("File path does not exist")
+
+    def _target_folder(self) -> str:
+        """Return the closest existing folder to the one the next capture is written to."""
+        for folder in (self.dev_conf.file.file_path + self.dev_conf.file.folder_name,
+                       self.dev_conf.file.file_path,
+                       self.disk_path):
+            if folder and os.path.isdir(folder):
+                return folder
+        return ""
+
+    def free_space_bytes(self) -> int:
+        """Return the free space on the filesystem of the destination folder."""
+        folder = self._target_folder()
+        if not folder:
+            return 0
+        return shutil.disk_usage(folder).free
+
+    def disk_write_mbps(self) -> float:
+        """Return the last measured write speed of the destination folder, 0 if never measured."""
+        cached = self._disk_bench.get(self._target_folder())
+        return cached[1] if cached else 0.0
+
+    def benchmark_disk(self, size_mb: int = 32) -> float:
+        """
+        Measure the sustained write speed (MB/s) of the destination folder by
+        writing and syncing a temporary file. Only run on request, the result
+        is cached per folder.
+        """
+        folder = self._target_folder()
+        if not folder:
+            return 0.0
+
+        n_chunks = max(1, size_mb // 4)
+        chunk = np.random.default_rng().integers(0, 255, 4 * 1024**2, dtype=np.uint8).tobytes()
+        bench_file = os.path.join(folder, ".odin_pico_disk_bench")
+        try:
+            start = time.perf_counter()
+            with open(bench_file, "wb") as f:
+                for _ in range(n_chunks):
+                    f.write(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            elapsed = time.perf_counter() - start
+        except OSError as e:
+            logging.error(f"Disk benchmark failed for {folder}: {e}")
+            return 0.0
+        finally:
+            if os.path.exists(bench_file):
+                os.remove(bench_file)
+
+        mbps = round(n_chunks * 4 / elapsed, 1)
+        self._disk_bench[folder] = (time.time(), mbps)
+        self.dev_conf.file.disk_write_mbps = mbps
+        logging.debug(f"Disk benchmark for {folder}: {mbps} MB/s")
+        return mbps
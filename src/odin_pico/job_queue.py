@@ -0,0 +1,247 @@
+"""Queue of capture jobs, run back to back on the acquisition thread."""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from odin_pico.pico_controller import PicoController
+
+import glob
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+from odin.adapters.parameter_tree import ParameterTreeError
+
+
+@dataclass
+class CaptureJob:
+    """A capture to run with a snapshot of settings, and its progress."""
+
+    job_id: int
+    name: str
+    # (path under device/settings, value) for every setting the job changes
+    settings: list = field(default_factory=list)
+    file_path: str = ""
+    state: str = "queued"   # queued, running, done, failed or aborted
+    error: str = ""
+    submitted: float = 0.0
+    started: float = 0.0
+    setup_s: float = 0.0
+    capture_s: float = 0.0
+    total_s: float = 0.0
+    progress: float = 0.0
+
+    def status(self) -> dict:
+        """Return the job as a dictionary for the parameter tree."""
+        return {
+            "id": self.job_id,
+            "name": self.name,
+            "state": self.state,
+            "error": self.error,
+            "file": self.file_path,
+            "progress": round(self.progress, 3),
+            "setup_s": round(self.setup_s, 3),
+            "capture_s": round(self.capture_s, 3),
+            "total_s": round(self.total_s, 3),
+            "wait_s": round((self.started or time.time()) - self.submitted, 1),
+        }
+
+
+class JobQueue:
+    """Run a campaign of captures, each with its own settings, without a client between runs.
+
+    Jobs are submitted as a list of {"name": ..., "settings": {...}}, where
+    settings has the layout of device/settings and only needs the values that
+    change. Every setting is checked against the tree and the output file names
+    are checked to be unique when the jobs are submitted, so a campaign is
+    rejected as a whole rather than failing part way through the night. The
+    acquisition thread takes the next job as soon as the previous one is done.
+    A job whose settings cannot be applied or do not verify is failed and the
+    settings are restored, so the next job does not inherit part of them.
+    An abort stops the running job and pauses the queue.
+    """
+
+    def __init__(self, controller: PicoController):
+        """Initialise the JobQueue class."""
+        self.controller = controller
+        self.jobs = []
+        self.current = None
+        self.paused = False
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _flatten(self, settings: dict, prefix: str = ""):
+        """Return (path, value) for every leaf of a nested settings dictionary."""
+        leaves = []
+        for key, value in settings.items():
+            path = f"{prefix}{key}"
+            if isinstance(value, dict):
+                leaves.extend(self._flatten(value, f"{path}/"))
+            else:
+                leaves.append((path, value))
+        return leaves
+
+    def _validate_setting(self, path: str, value):
+        """Raise ParameterTreeError unless value can be set at device/settings/path."""
+        current = self.controller.param_tree.get(f"device/settings/{path}")
+        current = current[path.split("/")[-1]]
+        if isinstance(current, dict):
+            raise ParameterTreeError(f"{path} is not a single setting")
+        if isinstance(current, bool) != isinstance(value, bool) or (
+                isinstance(current, (int, float)) and not isinstance(value, (int, float))) or (
+                isinstance(current, str) and not isinstance(value, str)):
+            raise ParameterTreeError(
+                f"{path} expects {type(current).__name__}, got {type(value).__name__}")
+
+    def _job_file(self, settings: dict) -> str:
+        """Return the file a job will write, with the job's file settings applied."""
+        file_conf = self.controller.dev_conf.file
+        folder = settings.get("file/folder_name", file_conf.folder_name)
+        name = settings.get("file/file_name", file_conf.file_name)
+        if not name:
+            raise ParameterTreeError("Every job needs a file name")
+        if folder and not folder.endswith("/"):
+            folder += "/"
+        if not name.endswith(".hdf5"):
+            name += ".hdf5"
+        return file_conf.file_path + folder + name
+
+    def submit(self, jobs):
+        """Validate and queue a job, or a list of jobs, all or none of them are queued."""
+        if isinstance(jobs, dict):
+            jobs = [jobs]
+        if not isinstance(jobs, list):
+            raise ParameterTreeError("Expected a job or a list of jobs")
+
+        with self._lock:
+            taken = {job.file_path for job in self.jobs if job.state in ("queued", "running")}
+        new_jobs = []
+        for index, spec in enumerate(jobs):
+            if not isinstance(spec, dict) or not isinstance(spec.get("settings", {}), dict):
+                raise ParameterTreeError(f"Job {index}: expected {{'name': ..., 'settings': {{...}}}}")
+            settings = self._flatten(spec.get("settings", {}))
+            try:
+                for path, value in settings:
+                    self._validate_setting(path, value)
+                file_path = self._job_file(dict(settings))
+            except ParameterTreeError as e:
+                raise ParameterTreeError(f"Job {index}: {e}")
+
+            root, ext = os.path.splitext(file_path)
+            if file_path in taken or os.path.isfile(file_path) or glob.glob(f"{root}_*{ext}"):
+                raise ParameterTreeError(f"Job {index}: {file_path} is already used")
+            taken.add(file_path)
+
+            new_jobs.append(CaptureJob(
+                job_id=0,
+                name=str(spec.get("name", f"job {index}")),
+                settings=settings,
+                file_path=file_path,
+                submitted=time.time(),
+            ))
+
+        with self._lock:
+            for job in new_jobs:
+                job.job_id = next(self._ids)
+                self.jobs.append(job)
+        logging.info("Queued %d capture jobs", len(new_jobs))
+        self.controller.wake()
+
+    def pending(self) -> bool:
+        """Return True when a job is waiting to run and the queue is not paused."""
+        return not self.paused and any(job.state == "queued" for job in self.jobs)
+
+    def set_paused(self, value):
+        """Pause or resume the queue, a running job is not interrupted."""
+        self.paused = bool(value)
+        self.controller.wake()
+
+    def clear(self, _=None):
+        """Remove every job that is not running."""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.state == "running"]
+
+    def abort_current(self):
+        """Mark the running job as aborted and pause the queue."""
+        if self.current is not None:
+            self.current.state = "aborted"
+            self.paused = True
+
+    def update_progress(self):
+        """Update the progress (0 to 1) of the running job from the capture state."""
+        job = self.current
+        if job is None:
+            return
+        ctrl = self.controller
+        capture = ctrl.dev_conf.capture
+        repeats = capture.repeat_amount if capture.capture_repeat else 1
+        if capture.capture_type:
+            run = min(ctrl.pico.elapsed_time / capture.capture_time, 1.0) if capture.capture_time else 0.0
+        else:
+            run = min(ctrl.dev_conf.capture_run.caps_comp / max(capture.n_captures, 1), 1.0)
+        job.progress = max(job.progress, (ctrl.dev_conf.capture_run.current_capture + run) / max(repeats, 1))
+
+    def _snapshot(self) -> dict:
+        """Return every leaf under device/settings, to restore if a job cannot be set up."""
+        return dict(self._flatten(self.controller.param_tree.get("device/settings")["settings"]))
+
+    def _restore(self, snapshot: dict):
+        """Set back every setting that differs from the snapshot."""
+        for path, value in self._snapshot().items():
+            if path in snapshot and snapshot[path] != value:
+                try:
+                    self.controller.set(f"device/settings/{path}", snapshot[path])
+                except Exception as e:
+                    # read only values derived from other settings follow them back
+                    logging.debug("Not restoring %s: %s", path, e)
+
+    def run_next(self):
+        """Apply the settings of the next queued job and run its capture, on the acquisition thread."""
+        with self._lock:
+            job = next((job for job in self.jobs if job.state == "queued"), None)
+            if job is None or self.paused:
+                return
+            job.state = "running"
+            job.started = time.time()
+            self.current = job
+
+        ctrl = self.controller
+        logging.info("Starting capture job %d: %s", job.job_id, job.name)
+        snapshot = self._snapshot()
+        try:
+            for path, value in job.settings:
+                ctrl.set(f"device/settings/{path}", value)
+            if not ctrl.pico_status.flags.verify_all:
+                raise ValueError("Settings did not verify")
+            if not ctrl.file_writer.check_file_name():
+                raise ValueError(f"{job.file_path} is empty or already exists")
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            logging.error("Capture job %d failed: %s", job.job_id, e)
+            # the next job starts from the settings as they were, not half of this job's
+            self._restore(snapshot)
+        else:
+            job.setup_s = time.time() - job.started
+            ctrl.dev_conf.file.last_write_success = False
+            ctrl.pico_status.flags.user_capture = True
+            capture_start = time.time()
+            ctrl.run_capture()
+            job.capture_s = time.time() - capture_start
+            if job.state == "running":
+                job.state = "failed" if not ctrl.dev_conf.file.last_write_success else "done"
+                job.error = "" if job.state == "done" else "File write failed"
+                job.progress = 1.0 if job.state == "done" else job.progress
+
+        job.total_s = time.time() - job.started
+        self.current = None
+        logging.info("Capture job %d %s in %.1fs", job.job_id, job.state, job.total_s)
+
+    def status(self) -> list:
+        """Return the status of every job in the queue."""
+        self.update_progress()
+        with self._lock:
+            return [job.status() for job in self.jobs]
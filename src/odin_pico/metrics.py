@@ -0,0 +1,99 @@
+"""Low-overhead timing of the individual phases of the acquisition pipeline."""
+
+import bisect
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class AcquisitionMetrics:
+    """Record the duration of each acquisition phase into fixed-size rolling windows.
+
+    Recording is a monotonic clock read and a write into a preallocated numpy
+    ring buffer, percentiles are only calculated when the values are requested.
+    Counters and histogram buckets are plain integers only ever written by the
+    acquisition thread, so readers (e.g. the metrics endpoint) never take a lock.
+    """
+
+    PHASES = (
+        "arm",              # ps5000aRunBlock
+        "trigger_wait",     # waiting for the block to be ready
+        "transfer",         # ps5000aGetValuesBulk
+        "trigger_decode",   # ps5000aGetTriggerInfoBulk and time stamp decoding
+        "pha",              # peak height analysis
+        "buffer_map",       # mapping buffers onto the scope memory segments
+        "hdf5_write",       # writing captures to file
+        "trigger_to_arm",   # GPIO trigger received until the scope is armed
+        "abort",            # user abort until the scope is stopped
+    )
+
+    COUNTERS = ("captures", "blocks", "bytes_written", "write_failures",
+                "missed_triggers", "unexpected_triggers")
+
+    # Upper bounds (s) of the phase duration histogram buckets
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, float("inf"))
+
+    def __init__(self, window: int = 1000, tracer=None):
+        """Initialise the AcquisitionMetrics class, spans are also passed to tracer if given."""
+        self.window = window
+        self.tracer = tracer
+        # Counters and histograms are never reset so they stay monotonic for scrapers
+        self.counters = {name: 0 for name in self.COUNTERS}
+        self.histograms = {phase: [0] * len(self.BUCKETS) for phase in self.PHASES}
+        self.histogram_sums = {phase: 0.0 for phase in self.PHASES}
+        self.reset()
+
+    def reset(self, *_):
+        """Clear every recorded duration."""
+        self._durations = {phase: np.zeros(self.window) for phase in self.PHASES}
+        self._counts = {phase: 0 for phase in self.PHASES}
+        self._last = {phase: 0.0 for phase in self.PHASES}
+
+    def record(self, phase: str, duration: float):
+        """Store the duration (s) of one occurrence of a phase."""
+        count = self._counts[phase]
+        self._durations[phase][count % self.window] = duration
+        self._last[phase] = duration
+        self._counts[phase] = count + 1
+        self.histograms[phase][bisect.bisect_left(self.BUCKETS, duration)] += 1
+        self.histogram_sums[phase] += duration
+
+    def record_since(self, phase: str, start: float):
+        """Store a phase which began at start (perf_counter) and ends now."""
+        duration = time.perf_counter() - start
+        self.record(phase, duration)
+        if self.tracer is not None:
+            self.tracer.complete(phase, start, duration)
+
+    def count(self, name: str, amount: int = 1):
+        """Increase one of the monotonic counters."""
+        self.counters[name] += amount
+
+    @contextmanager
+    def span(self, phase: str):
+        """Time the enclosed block as one occurrence of phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_since(phase, start)
+
+    def summary(self, phase: str) -> dict:
+        """Return the count and rolling statistics (ms) of a phase."""
+        count = self._counts[phase]
+        values = self._durations[phase][:min(count, self.window)] * 1000
+        if count == 0:
+            return {"count": 0, "last_ms": None, "mean_ms": None, "p50_ms": None,
+                    "p90_ms": None, "p99_ms": None, "max_ms": None}
+
+        p50, p90, p99 = np.percentile(values, (50, 90, 99))
+        return {
+            "count": count,
+            "last_ms": round(self._last[phase] * 1000, 3),
+            "mean_ms": round(float(values.mean()), 3),
+            "p50_ms": round(float(p50), 3),
+            "p90_ms": round(float(p90), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(float(values.max()), 3),
+        }
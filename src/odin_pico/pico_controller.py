@@ -2,6 +2,7 @@
 
 import logging
 import math
+import os
 import re
 import time
 import threading
@@ -11,7 +12,9 @@ from functools import partial
 from odin.adapters.parameter_tree import ParameterTree, ParameterTreeError
 from tornado.concurrent import run_on_executor
 
+from odin_pico.acquisition_state import AcquisitionStateMachine
 from odin_pico.analysis import PicoAnalysis
+from odin_pico.analysis_worker import AnalysisWorker
 from odin_pico.buffer_manager import BufferManager
 from odin_pico.DataClasses.pico_config import DeviceConfig
 from odin_pico.DataClasses.gpib_config import GPIBConfig
@@ -19,7 +22,12 @@ from odin_pico.DataClasses.gpio_config import GPIOConfig
 from odin_pico.DataClasses.pico_status import DeviceStatus
 
 from odin_pico.file_writer import FileWriter
+from odin_pico.job_queue import JobQueue
+from odin_pico.metrics import AcquisitionMetrics
 from odin_pico.pico_device import PicoDevice
+from odin_pico.profiler import CaptureProfiler
+from odin_pico.tec_telemetry import TecTelemetry
+from odin_pico.tracer import TraceRecorder
 from odin_pico.Utilities.controller_util import ControllerUtil
 from odin_pico.Utilities.pico_util import PicoUtil
 from odin_pico.Utilities.gpib_util import GPIBUtil
@@ -29,13 +37,48 @@ from odin_pico.ParameterTrees.pico_tree import PicoTreeBuilder
 
 class PicoController:
     """Class which holds parameter trees and manages the PicoScope capture process."""
-    executor = futures.ThreadPoolExecutor(max_workers=2)
 
-    def __init__(self, loop, path, disk):
-        """Initialise the PicoController Class."""
+    def __init__(self, loop, path, disk, serial="", acq_cpus=None, acq_nice=0,
+                 housekeeping_workers=2, analysis_process=False, tec_telemetry=None):
+        """
+        Initialise the PicoController Class, for the scope with the given serial if set.
+        update_loop runs on its own thread, pinned to acq_cpus and reniced to acq_nice
+        when set, while TEC waits and disk benchmarks use the housekeeping pool.
+        With analysis_process set, PHA is histogrammed by a separate worker process.
+        Scopes sharing a TEC pass the first controller's tec_telemetry, so it is polled once.
+        """
+        thread_name = f"pico_{serial}" if serial else "pico"
+
+        # Each controller has its own threads, so several scopes can acquire in parallel.
+        # The pool is the run_on_executor executor, it never runs the acquisition loop.
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=housekeeping_workers, thread_name_prefix=f"{thread_name}_housekeeping"
+        )
+        self.acq_cpus = set(acq_cpus) if acq_cpus else None
+        self.acq_nice = acq_nice
+        self.acq_thread = threading.Thread(
+            target=self.update_loop, name=f"{thread_name}_acquisition", daemon=True
+        )
+        self.acq_thread_info = {"name": self.acq_thread.name, "native_id": 0,
+                                "cpus": [], "nice": 0}
+        self._bench_future = None
+        # settings_gen of the last preflight check, None to check again
+        self._preflight_gen = None
 
         # Threading lock and control variables
         self.update_loop_active = loop
+        # Set to wake update_loop early, e.g. on a GPIO trigger or a capture command
+        self.wake_event = threading.Event()
+        # Capture commands from request threads and the GPIO callback, applied by update_loop
+        self.acq_state = AcquisitionStateMachine()
+        self.acq_state.register("start", self._start_capture, on_reject=self._drop_start_barrier)
+        self.acq_state.register("set_temp", lambda value, state: self.set_temp_single_shot())
+        self.acq_state.register("trigger", self._handle_trigger)
+        # Incremented on every settings change, a pre-armed scope is only used if unchanged
+        self.settings_gen = 0
+        self._prearm_gen = None
+        # Set by a multi-scope adapter, told of triggers this scope will not reply to
+        self.on_trigger_missed = None
 
         # Objects for handling configuration, status and utilities
         self.dev_conf = DeviceConfig()
@@ -44,44 +87,62 @@ class PicoController:
         self.pico_status = DeviceStatus()
         self.util = PicoUtil()
         self.gpib_util = GPIBUtil(self)
+        self.tec_telemetry = tec_telemetry or TecTelemetry(self)
         self.ctrl_util = ControllerUtil(self)
+        self.jobs = JobQueue(self)
 
         # Initialise objects to represent different system components
-        self.buffer_manager = BufferManager(self.dev_conf)
-        self.file_writer = FileWriter(disk, self.dev_conf, self.buffer_manager, self.pico_status)
+        self.tracer = TraceRecorder()
+        self.metrics = AcquisitionMetrics(tracer=self.tracer)
+        self.profiler = CaptureProfiler()
+        self.analysis_worker = (
+            AnalysisWorker(f"{thread_name}_analysis") if analysis_process else None
+        )
+        self.buffer_manager = BufferManager(self.dev_conf, self.analysis_worker)
+        self.file_writer = FileWriter(disk, self.dev_conf, self.buffer_manager, self.pico_status,
+                                      self.metrics, self.tec_telemetry)
         self.analysis = PicoAnalysis(
-            self.dev_conf, self.buffer_manager, self.pico_status
+            self.dev_conf, self.buffer_manager, self.pico_status, self.metrics
         )
         self.pico = PicoDevice(disk, self.dev_conf, self.pico_status,
-                               self.buffer_manager, self.analysis, self.file_writer, self.gpio_config)
+                               self.buffer_manager, self.analysis, self.file_writer, self.gpio_config,
+                               self.metrics)
         
         # Initialise parameter tree to None, is built in initialize_adapters with access to other adapters
         self.param_tree = None
         self.dev_conf.file.file_path = path
+        self.dev_conf.mode.serial = serial
+        # live view runs for one idle timeout after start up before waiting for a client
+        self.dev_conf.live_view.last_client_get = time.time()
         self.trig_rate_hz = 0.0
         self.cap_times = []
 
         if self.update_loop_active:
-            self.update_loop()
+            self.acq_thread.start()
 
         # Set initial state of the verification system
         self.ctrl_util.verify_settings()
 
-    def initialize_adapters(self, adapters):
-        """Get access to all of the other adapters and build complete parameter tree."""
+    def initialize_adapters(self, adapters, gpio=True):
+        """
+        Get access to all of the other adapters and build complete parameter tree.
+        With gpio False the adapter registers for GPIO triggers and forwards them.
+        """
         try:
             self.gpib = adapters['gpib'] if adapters else None
         except:
             self.gpib = None
 
-        try:
-            self.comms = adapters['gpio-server'] if adapters else None
-            self.trigger_controller = self.comms.get_controller()
-            self.trigger_controller.register_event(self.trigger_received)
-            self.gpio_config.reply_method = self.trigger_controller.get_reply_method()
-            self.gpio_config.enabled = True
-        except Exception as e:
-            self.comms = None
+        self.comms = None
+        if gpio:
+            try:
+                self.comms = adapters['gpio-server'] if adapters else None
+                self.trigger_controller = self.comms.get_controller()
+                self.trigger_controller.register_event(self.trigger_received)
+                self.gpio_config.reply_method = self.trigger_controller.get_reply_method()
+                self.gpio_config.enabled = True
+            except Exception as e:
+                self.comms = None
         
         try:
             if self.gpib:
@@ -94,6 +155,10 @@ class PicoController:
                 if self.gpib_config.tec_devices:
                     self.gpib_config.selected_tec = self.gpib_config.tec_devices[0]
 
+                # only the controller owning the telemetry polls the TEC
+                if self.gpib_config.avail and self.tec_telemetry.controller is self:
+                    self.tec_telemetry.start()
+
             # instaniate the parametertree builder classes
             pico_tree_builder = PicoTreeBuilder(self)
             gpib_tree_builder = GPIBTreeBuilder(self)
@@ -112,20 +177,66 @@ class PicoController:
             logging.error(e)
 
     def trigger_received(self, identity):
+        self.tracer.instant("gpio_trigger", "gpio")
+        self.acq_state.submit("trigger", (identity, time.perf_counter()))
+        self.wake()
 
+    def _handle_trigger(self, value, state):
+        """Apply a GPIO trigger, judged against the state it arrived in."""
+        identity, trigger_perf = value
         if self.gpio_config.listening:
-            if self.gpio_config.capture:
+            if self.gpio_config.capture or state in ("capturing", "waiting_tec", "aborting"):
                 self.gpio_config.missed_triggers += 1
+                # the gpio_config counts restart with each listening run, the metric never does
+                self.metrics.count("missed_triggers")
                 self.gpio_config.gpio_captures += 1
                 logging.warning(f"Trigger missed: {self.gpio_config.gpio_captures}")
+                if self.on_trigger_missed is not None:
+                    self.on_trigger_missed(identity)
                 return
 
             self.gpio_config.gpio_captures += 1
             self.dev_conf.file.trig_suffix = f"_{self.gpio_config.gpio_captures:04d}"
             self.gpio_config.identity = identity
+            self.gpio_config.trigger_perf = trigger_perf
             self.gpio_config.capture = True
         else:
             self.gpio_config.unexpected_triggers += 1
+            self.metrics.count("unexpected_triggers")
+            if self.on_trigger_missed is not None:
+                self.on_trigger_missed(identity)
+
+    def _start_capture(self, value, state):
+        """Begin a user requested capture."""
+        if value:
+            self.pico_status.flags.user_capture = True
+
+    def _drop_start_barrier(self, value=None, state=None):
+        """Release the other scopes of a synchronised start this scope will not take part in."""
+        barrier, self.pico.start_barrier = self.pico.start_barrier, None
+        if barrier is not None:
+            barrier.abort()
+
+    def request_start(self, value):
+        """Queue a user capture request."""
+        self.acq_state.submit("start", value)
+        self.wake()
+
+    def request_set_temp(self, _=None):
+        """Queue a single-shot TEC set point."""
+        self.acq_state.submit("set_temp")
+        self.wake()
+
+    def request_abort(self, value):
+        """Abort immediately, the capture in progress waits on the abort event."""
+        if value:
+            self.pico_status.flags.abort_perf = time.perf_counter()
+            if self.acq_state.state in ("capturing", "waiting_tec"):
+                self.acq_state.set_state("aborting")
+            # the rest of the job queue waits until it is resumed
+            self.jobs.abort_current()
+        self.pico_status.flags.abort_cap = value
+        self.wake()
 
     def run_capture(self):
         """Tell the picoscope to collect and return data."""
@@ -133,9 +244,13 @@ class PicoController:
         # if a single-shot temperature has been set, wait for tec to stablise
         if self.pico_status.flags.temp_set and self.gpib_config.control_enabled:
             self.pico_status.flags.system_state = "Waiting for TEC to stabilise"
+            prev_state = self.acq_state.state
+            self.acq_state.set_state("waiting_tec")
             while self.pico_status.flags.temp_set and not self.pico_status.flags.abort_cap:
-                time.sleep(0.1)
+                self.pico_status.flags.wait_abort(0.1)
                 logging.debug("waiting for temp")
+            if not self.pico_status.flags.abort_cap:
+                self.acq_state.set_state(prev_state)
             # now temp_reached=True
             # reset abort flag if its set
             self.pico_status.flags.abort_cap = False
@@ -158,6 +273,7 @@ class PicoController:
                         self.file_writer.file_times = []
 
                     self.file_writer.file_error = False
+                    self.run_preflight(force=True)
 
                     # Check if user has requested the capture to be repeated
                     if self.dev_conf.capture.capture_repeat:
@@ -178,7 +294,7 @@ class PicoController:
                         self.buffer_manager.reset_pha()
                         self.dev_conf.capture_run.current_capture = capture_run
 
-                        logging.debug(f"current capture repeat: {self.dev_conf.capture_run.current_capture}")
+                        logging.debug("current capture repeat: %s", self.dev_conf.capture_run.current_capture)
 
                         # Complete a capture run, based on capture number
                         if not self.dev_conf.capture.capture_type:
@@ -212,7 +328,7 @@ class PicoController:
                                 if self.pico_status.flags.abort_cap:
                                     delay = 0
                                 logging.debug("Delaying")
-                                time.sleep(0.1)
+                                self.pico_status.flags.wait_abort(0.1)
 
                         # Change system state, depends on if capture was repeated
                         if (capture_run + 1) == cap_loop:
@@ -236,17 +352,25 @@ class PicoController:
                         self.gpio_config.reply_method(self.gpio_config.identity)
                         self.pico_status.flags.system_state = f"Listening. Captures completed: {self.gpio_config.gpio_captures}"
 
+                    # Consolidated files stay open until the repeat or GPIO run is over
+                    if not self.gpio_config.listening:
+                        self.file_writer.close_consolidated()
+
                 else:
                     self.file_writer.file_error = True
                     self.pico_status.flags.system_state = (
                         "File Name Empty or Already Exists")
                     self.pico_status.flags.user_capture = False
+                    self._drop_start_barrier()
 
             # If user hasn't requested a capture, complete a LV capture run
             else:
+                # a GPIO run stopped by the user leaves its consolidated file open
+                self.file_writer.close_consolidated()
                 if not self.file_writer.file_error and not self.gpio_config.listening and self.pico_status.open_unit == 0:
                     self.pico_status.flags.system_state = "Collecting LV Data"
                 self.pico.calc_max_caps()
+                self.run_preflight()
                 self.user_capture(False)
                 self.pico_status.flags.abort_cap = False
 
@@ -255,8 +379,11 @@ class PicoController:
         ):
             self.pico_status.flags.system_state = "Connected to PicoScope, Idle"
 
-    def user_capture(self, save_file):
-        """Run the appropriate steps for a set of captures."""
+    def user_capture(self, save_file, write=True):
+        """
+        Run the appropriate steps for a set of captures. With write False the
+        captures are left in the buffers for a later call to write_capture.
+        """
         # Identify whether the capture is a user capture or just for LV
         if save_file:
             captures = self.dev_conf.capture.n_captures
@@ -268,11 +395,20 @@ class PicoController:
         # Set caps_remaining for liveview mode
         if not save_file:
             self.dev_conf.capture_run.caps_remaining = 2
+
+        self.buffer_manager.list_mode_active = save_file and self.dev_conf.file.list_mode
+        if save_file:
+            self.buffer_manager.trigger_rate.reset_run()
             
         self.ctrl_util.set_capture_run_length()
+
+        # A scope pre-armed while listening already holds the settings, buffers and mapping
+        prearmed = save_file and self.gpio_config.prearmed and self._prearm_gen == self.settings_gen
+        if not prearmed:
+            self.gpio_config.prearmed = False
     
         # Checks run_setup completes successfully, calls it with captures if save_file is not true
-        if (self.pico.run_setup() if save_file else self.pico.run_setup(captures)):
+        if prearmed or (self.pico.run_setup() if save_file else self.pico.run_setup(captures)):
             start_acq_time = time.time()
             while self.dev_conf.capture_run.caps_comp < captures:
                 if not self.pico_status.flags.abort_cap:
@@ -288,16 +424,35 @@ class PicoController:
             # Saves captures to a file, if requested
             if save_file:
                 self.cap_times.append(time.time() - start_acq_time)
-                start_fw_time = time.time()
-                self.file_writer.write_hdf5()
-                self.file_writer.file_times.append(time.time() - start_fw_time)
+                if write:
+                    self.write_capture()
 
+        if write:
+            self.buffer_manager.list_mode_active = False
         self.dev_conf.capture_run.reset()
 
+    def write_capture(self, time_based=False):
+        """Write the capture held in the buffers to file, and release time-based blocks."""
+        if time_based:
+            if self.file_writer.stream_active:
+                self.file_writer.finish_stream()
+            else:
+                self.file_writer.write_hdf5(write_accumulated=True)
+            self.buffer_manager.save_lv_data(True)
+            self.buffer_manager.clear_arrays()
+        else:
+            start_fw_time = time.time()
+            self.file_writer.write_hdf5()
+            self.file_writer.file_times.append(time.time() - start_fw_time)
+        self.buffer_manager.list_mode_active = False
+
     def capture_run(self):
         """Run the necessary steps for a capture."""
         # Run the scope, and update the captures completed
-        self.pico.assign_pico_memory()
+        if self.gpio_config.prearmed:
+            self.gpio_config.prearmed = False
+        else:
+            self.pico.assign_pico_memory()
         start_time = time.time()
         self.pico.run_block()
         self.trig_rate_hz = f"{round(self.pico.seg_caps / (time.time() - start_time), 2)}Hz"
@@ -307,28 +462,73 @@ class PicoController:
 
         # Process the data, for the purposes of LV and PHA
         if not self.pico_status.flags.abort_cap:
-            self.buffer_manager.save_lv_data(False)
+            with self.tracer.span("save_lv_data", "buffer"):
+                self.buffer_manager.save_lv_data(False)
             self.analysis.pha_one_peak()
 
-    def tb_capture(self):
+    def prearm_capture(self):
         """
+        Prepare the first block of the next GPIO triggered capture while listening:
+        apply the scope settings, generate the buffers and map them onto the scope
+        memory. The block is not started, RunBlock is only issued on the trigger.
+        """
+        if (self.gpio_config.prearmed and self._prearm_gen == self.settings_gen) or (
+                self.dev_conf.capture.capture_type or not self.pico_status.flags.verify_all):
+            return
+
+        gen = self.settings_gen
+        self.gpio_config.prearmed = False
+        self.ctrl_util.calc_samp_time()
+        self.ctrl_util.set_capture_run_limits()
+        self.ctrl_util.set_capture_run_length()
+        if self.pico.run_setup():
+            self.pico.assign_pico_memory()
+            self._prearm_gen = gen
+            self.gpio_config.prearmed = True
+
+    def tb_capture(self, write=True):
+        """
+        Run a time-based capture. With write False the blocks are left in the
+        buffers (and a stream left open) for a later call to write_capture.
         """
         # validate this method of calculating max captures!
         self.ctrl_util.set_capture_run_limits()
         self.dev_conf.capture_run.caps_in_run = int(self.dev_conf.capture_run.caps_max/2)
+        self.buffer_manager.list_mode_active = self.dev_conf.file.list_mode
+        self.buffer_manager.trigger_rate.reset_run()
+        self.file_writer.begin_stream()
         start_tb_time = time.time()
         self.pico.run_time_based_capture(
             self.dev_conf.capture.capture_time
             )
         self.cap_times.append(time.time() - start_tb_time)
-        self.file_writer.write_hdf5(write_accumulated=True)
-        self.buffer_manager.save_lv_data(True)
-        self.buffer_manager.clear_arrays()
+        if write:
+            self.write_capture(time_based=True)
         self.pico_status.flags.abort_cap = False
+
+    def live_view_idle(self):
+        """Return True when no client has read the live view recently and no capture is queued."""
+        lv = self.dev_conf.live_view
+        lv.idle = (
+            lv.idle_timeout_s > 0 and
+            not self.pico_status.flags.user_capture and
+            not self.pico_status.flags.temp_set and
+            time.time() - lv.last_client_get > lv.idle_timeout_s
+        )
+        return lv.idle
+
+    def heartbeat(self):
+        """Check the scope is still connected while live view is paused."""
+        if self.pico_status.open_unit == 0:
+            if self.pico.ping_scope():
+                self.pico_status.flags.system_state = "Connected to PicoScope, live view paused"
+            else:
+                self.pico_status.open_unit = -1
+                self.pico_status.flags.system_state = "Lost connection to PicoScope"
    
     def set_temp_single_shot(self, _=None):
         """
-        Called when the user sets /gpib/set/set_temp.
+        Called from the command queue when the user sets /gpib/set/set_temp.
         Reads temp_target and starts a background waiting thread.
         """
         T = self.gpib_config.temp_target
@@ -337,6 +537,15 @@ class PicoController:
         self.pico_status.flags.system_state = f"Setting TEC {T:.2f} °C"
         self._bg_set_and_wait(T)
 
+    def dump_trace(self, _=None):
+        """Write the recorded trace events to the data folder."""
+        self.tracer.dump(self.dev_conf.file.file_path)
+
+    def start_profile(self, _=None):
+        """Profile the capture thread, writing the results to the data folder."""
+        self.profiler.output_folder = self.dev_conf.file.file_path
+        self.profiler.start()
+
     def set_listening(self, value):
         self.gpio_config.listening = value
         if value:
@@ -382,42 +591,140 @@ class PicoController:
         
     ##### Adapter specific functions below #####
 
-    @run_on_executor
+    def _configure_acquisition_thread(self):
+        """Apply the CPU affinity and nice value to the calling (acquisition) thread."""
+        native_id = threading.get_native_id()
+        if self.acq_cpus and hasattr(os, "sched_setaffinity"):
+            try:
+                # pid 0 is the calling thread, not the whole process
+                os.sched_setaffinity(0, self.acq_cpus)
+            except OSError as e:
+                logging.warning(f"Could not pin the acquisition thread to {self.acq_cpus}: {e}")
+        if self.acq_nice and hasattr(os, "setpriority"):
+            try:
+                # a negative nice value needs CAP_SYS_NICE
+                os.setpriority(os.PRIO_PROCESS, native_id, self.acq_nice)
+            except OSError as e:
+                logging.warning(f"Could not set acquisition thread nice to {self.acq_nice}: {e}")
+
+        self.acq_thread_info["native_id"] = native_id
+        if hasattr(os, "sched_getaffinity"):
+            self.acq_thread_info["cpus"] = sorted(os.sched_getaffinity(0))
+        if hasattr(os, "getpriority"):
+            self.acq_thread_info["nice"] = os.getpriority(os.PRIO_PROCESS, native_id)
+
+    def run_preflight(self, force=False):
+        """Run the preflight check when the settings have changed since the last one, or if forced."""
+        if force or self._preflight_gen != self.settings_gen:
+            self._preflight_gen = self.settings_gen
+            self.ctrl_util.preflight_check()
+
+    def disk_benchmark_running(self) -> bool:
+        """Return True while a disk benchmark is running."""
+        return self._bench_future is not None and not self._bench_future.done()
+
+    def run_disk_benchmark(self, _=None):
+        """Measure the disk write speed in the housekeeping pool, then re-run the preflight check."""
+        if self.disk_benchmark_running():
+            return
+        self._bench_future = self.executor.submit(self.file_writer.benchmark_disk)
+        self._bench_future.add_done_callback(self._benchmark_done)
+
+    def _benchmark_done(self, _):
+        """Have the next live view loop run the preflight check with the new disk write speed."""
+        self._preflight_gen = None
+        self.wake()
+
     def update_loop(self):
-        """Execute thread, responsible for calling the run_capture function at timed intervals."""
+        """Acquisition thread, responsible for calling the run_capture function at timed intervals."""
+        self._configure_acquisition_thread()
         while self.update_loop_active:
+            self.profiler.poll()
+            self.acq_state.process()
             if not self.gpio_config.listening:
-                self.run_capture()
-                time.sleep(0.2)
+                if self.jobs.pending() and not self.pico_status.flags.user_capture:
+                    # queued jobs run back to back, without the live view interval between them
+                    self.acq_state.set_state("capturing")
+                    with self.tracer.span("capture_job", "loop"):
+                        self.jobs.run_next()
+                    self.pico_status.flags.abort_perf = 0.0
+                    continue
+                if self.live_view_idle():
+                    self.acq_state.set_state("idle")
+                    self.heartbeat()
+                    self.wait_for_wake(max(self.dev_conf.live_view.heartbeat_s, 0.05))
+                    continue
+                self.acq_state.set_state(
+                    "capturing" if self.pico_status.flags.user_capture else "live_view")
+                with self.tracer.span("run_capture", "loop"):
+                    self.run_capture()
+                self.pico_status.flags.abort_perf = 0.0
+                self.wait_for_wake(max(self.dev_conf.live_view.interval_s, 0.05))
             elif self.gpio_config.capture:
-                self.run_capture()
-                time.sleep(0.05)
+                self.acq_state.set_state("capturing")
+                with self.tracer.span("run_capture", "loop"):
+                    self.run_capture()
+                # triggers from here on arrive between captures and must not count as missed
+                if self.gpio_config.listening:
+                    self.acq_state.set_state("listening")
+                self.pico_status.flags.abort_perf = 0.0
+                self.wait_for_wake(0.05)
             else:
-                time.sleep(0.05)
+                self.acq_state.set_state("listening")
+                if self.gpio_config.prearm:
+                    self.prearm_capture()
+                self.wait_for_wake(1.0)
+
+    def wait_for_wake(self, timeout):
+        """Sleep until the timeout, or until woken by a trigger, command or abort."""
+        if self.wake_event.wait(timeout):
+            self.wake_event.clear()
+
+    def wake(self, *_):
+        """Wake update_loop so a new request is acted on immediately."""
+        self.wake_event.set()
 
     def set_update_loop_state(self, state=bool):
         """Set the state of the update_loop in the executor thread."""
         self.update_loop_active = state
+        self.wake_event.set()
 
     def cleanup(self):
         """Responsible for ensuring the picoscope is closed cleanly when the adapter is shutdown."""
         self.set_update_loop_state(False)
         self.pico_status.flags.abort_cap = True
         self.gpio_config.listening = False
+        self.file_writer.close_consolidated()
         self.pico.stop_scope()
+        if self.acq_thread.is_alive():
+            self.acq_thread.join(timeout=5)
+        if self.tec_telemetry.controller is self:
+            self.tec_telemetry.stop()
+        if self.analysis_worker is not None:
+            self.analysis_worker.stop()
+        self.executor.shutdown(wait=False)
         logging.debug("Stopping PicoScope services and closing device")
 
     def get(self, path):
-        """Get the parameter tree."""
-        return self.param_tree.get(path)
+        """Get the parameter tree, a read covering live_view keeps live view running."""
+        if path.strip("/") in ("", "device") or path.strip("/").startswith("device/live_view"):
+            self.dev_conf.live_view.last_client_get = time.time()
+            if self.dev_conf.live_view.idle:
+                self.dev_conf.live_view.idle = False
+                self.wake()
+        with self.tracer.span("tree_get", "ioloop"):
+            return self.param_tree.get(path)
 
     def set(self, path, data):
         """Set parameters in the parameter tree."""
-        try:
-            self.param_tree.set(path, data)
-        except ParameterTreeError as e:
-            raise PicoControllerError(e)
-        self.ctrl_util.verify_settings()
+        with self.tracer.span("tree_set", "ioloop"):
+            self.settings_gen += 1
+            try:
+                self.param_tree.set(path, data)
+            except ParameterTreeError as e:
+                raise PicoControllerError(e)
+            self.ctrl_util.verify_settings()
+        self.wake()
 
 class PicoControllerError(Exception):
     pass
@@ -3,8 +3,10 @@
 import ctypes
 import logging
 import math
+import numpy as np
 import psutil
 import sys
+import threading
 import time
 
 from picosdk.functions import mV2adc
@@ -18,6 +20,12 @@ from odin_pico.PS5000A_Trigger_Info import Trigger_Info
 from odin_pico.file_writer import FileWriter
 from odin_pico.analysis import PicoAnalysis
 from odin_pico.DataClasses.gpio_config import GPIOConfig
+from odin_pico.metrics import AcquisitionMetrics
+
+# PS5000A_TRIGGER_INFO.status values of a usable time stamp
+PICO_OK = 0x00000000
+# the time stamp counter restarted at this segment, e.g. after a timebase change
+PICO_DEVICE_TIME_STAMP_RESET = 0x01000000
 
 class PicoDevice:
     """Class that communicates with the scope to collect data."""
@@ -25,7 +33,7 @@ class PicoDevice:
     def __init__(
         self, disk, dev_conf=DeviceConfig(), pico_status=DeviceStatus(),
         buffer_manager=BufferManager(), analysis=PicoAnalysis(),
-        file_writer=None, gpio_config=GPIOConfig()
+        file_writer=None, gpio_config=GPIOConfig(), metrics=None
     ):
         """Initialise the PicoDevice class."""
         self.util = PicoUtil()
@@ -35,6 +43,7 @@ class PicoDevice:
         self.file_writer = file_writer or FileWriter(disk)
         self.analysis = analysis
         self.gpio_config = gpio_config
+        self.metrics = metrics or AcquisitionMetrics()
         
         self.channels = [
             getattr(self.dev_conf, f"channel_{name}")
@@ -48,11 +57,26 @@ class PicoDevice:
         self.rec_caps = 0
         self.rec_time = 0
 
+        # Run clock used to place trigger time stamps of every block on one timeline
+        self.run_t0 = None
+        self.block_t0 = 0.0
+        self._arm_perf = 0.0
+        self._stop_perf = 0.0
+        self._run_perf = 0.0
+        self._last_stop_perf = None
+        # Last poll that saw no capture, and the first that saw one, bracketing the first trigger
+        self._last_empty_perf = 0.0
+        self._first_seen_perf = None
+
+        # Set to a shared barrier to arm the first block of a capture in step with other scopes
+        self.start_barrier = None
+
     def open_unit(self):
         """Initalise connection with the picoscope, and settings the status values."""
-        # Open the PicoScope
+        # Open the PicoScope, by serial when one is configured
+        serial = self.dev_conf.mode.serial.encode() if self.dev_conf.mode.serial else None
         self.pico_status.open_unit = ps.ps5000aOpenUnit(
-            ctypes.byref(self.dev_conf.mode.handle), None, self.dev_conf.mode.resolution
+            ctypes.byref(self.dev_conf.mode.handle), serial, self.dev_conf.mode.resolution
         )
 
         # Set maximum values
@@ -72,6 +96,13 @@ class PicoDevice:
         Map the local buffers in the buffer_manager to the picoscope for
         each individual trace to be captured on each channel by the picoscope.
         """
+        # the worker histograms whole channel arrays, it must finish before the scope refills them
+        self.buffer_manager.wait_for_analysis()
+        with self.metrics.span("buffer_map"):
+            self._assign_pico_memory()
+
+    def _assign_pico_memory(self):
+        """Map every capture of the next run onto a scope memory segment."""
 
         ps.ps5000aStop(self.dev_conf.mode.handle)
         # Set the number of memory segments to be used
@@ -89,6 +120,8 @@ class PicoDevice:
             + self.dev_conf.capture.post_trig_samples
         )
 
+        self.buffer_manager.run_row_offset = self.dev_conf.capture_run.caps_comp
+
         # Assign data buffers for the PicoScope to write to
         for c, b in zip(
             self.buffer_manager.active_channels,
@@ -138,7 +171,7 @@ class PicoDevice:
             self.dev_conf.trigger.auto_trigger_ms,
         )
         if self.pico_status.flags.user_capture:
-            logging.debug(f"Trigger: {self.dev_conf.trigger.active}")
+            logging.debug("Trigger: %s", self.dev_conf.trigger.active)
 
     def set_channels(self):
         """Set the channel information for each channel on the picoscope."""
@@ -176,6 +209,7 @@ class PicoDevice:
         if self.pico_status.open_unit == 0:
             self.set_channels()
             self.set_trigger()
+            self.run_t0 = None
 
             if args:
                 self.buffer_manager.generate_arrays(args[0])
@@ -249,16 +283,18 @@ class PicoDevice:
             elif self.gpio_config.capture:
                 self.pico_status.flags.system_state = f"Completing capture: {self.gpio_config.gpio_captures}"
 
-        ps.ps5000aRunBlock(
-            self.dev_conf.mode.handle,
-            self.dev_conf.capture.pre_trig_samples,
-            self.dev_conf.capture.post_trig_samples,
-            self.dev_conf.mode.timebase,
-            None,
-            0,
-            None,
-            None,
-        )
+        self._mark_block_start()
+        with self.metrics.span("arm"):
+            ps.ps5000aRunBlock(
+                self.dev_conf.mode.handle,
+                self.dev_conf.capture.pre_trig_samples,
+                self.dev_conf.capture.post_trig_samples,
+                self.dev_conf.mode.timebase,
+                None,
+                0,
+                None,
+                None,
+            )
 
         current_system_state = self.pico_status.flags.system_state
 
@@ -287,12 +323,15 @@ class PicoDevice:
             # Stop scope if user chooses to abort capture
             if self.pico_status.flags.abort_cap:
                 ps.ps5000aStop(self.dev_conf.mode.handle)
+                self._record_abort_latency()
                 collect = False
 
-            time.sleep(0.05)
+            self.pico_status.flags.wait_abort(0.05)
             self.get_cap_count()
             self.prev_seg_caps = self.seg_caps
 
+        self._stop_perf = time.perf_counter()
+        self.metrics.record_since("trigger_wait", self._arm_perf)
         self.pico_status.flags.system_state = current_system_state
         self.get_cap_count()
 
@@ -304,16 +343,26 @@ class PicoDevice:
         # Retrive the captures that have been collected
 
         if not self.pico_status.flags.abort_cap:
-            ps.ps5000aGetValuesBulk(
-                self.dev_conf.mode.handle,
-                ctypes.byref(self.dev_conf.meta_data.max_samples),
-                0,
-                (seg_to_indx),
-                0,
-                0,
-                ctypes.byref(self.buffer_manager.overflow),
-            )
-            self.get_trigger_timing()
+            with self.metrics.span("transfer"):
+                ps.ps5000aGetValuesBulk(
+                    self.dev_conf.mode.handle,
+                    ctypes.byref(self.dev_conf.meta_data.max_samples),
+                    0,
+                    (seg_to_indx),
+                    0,
+                    0,
+                    ctypes.byref(self.buffer_manager.overflow),
+                )
+            with self.metrics.span("trigger_decode"):
+                self.get_trigger_timing()
+            self.metrics.count("captures", self.seg_caps or self.dev_conf.capture_run.caps_in_run)
+            self.metrics.count("blocks")
+
+        self._account_live_time(
+            self.seg_caps,
+            not self.pico_status.flags.abort_cap and
+            self.seg_caps >= self.dev_conf.capture_run.caps_in_run
+        )
             
     def run_time_based_capture(self, total_time: float):
         """
@@ -321,6 +370,7 @@ class PicoDevice:
         Accumulates PHA and trigger info across the whole run.
         """
         self.buffer_manager.clear_arrays()
+        self.run_t0 = None
 
         start_time     = time.time()
         self.elapsed_time = 0.0
@@ -336,6 +386,7 @@ class PicoDevice:
             self.dev_conf.meta_data.total_cap_samples
         )
         self.pico_status.block_ready = ctypes.c_int16(0)
+        self.dev_conf.capture.early_stops = 0
 
         while True:
             self.elapsed_time = time.time() - start_time
@@ -355,17 +406,21 @@ class PicoDevice:
 
             # Start new capture block if one is not currently running
             if not block_running:
+                if self.dev_conf.capture.adaptive_block:
+                    self._size_next_block()
                 # setup device for capture, allocate memory etc.
                 if self.run_tb_setup(): 
                     # Begin capture if capture can fit into memory                    
                     self.pico_status.block_ready = ctypes.c_int16(0)
-                    ps.ps5000aRunBlock(
-                        self.dev_conf.mode.handle,
-                        self.dev_conf.capture.pre_trig_samples,
-                        self.dev_conf.capture.post_trig_samples,
-                        self.dev_conf.mode.timebase,
-                        None, 0, None, None
-                    )
+                    self._mark_block_start()
+                    with self.metrics.span("arm"):
+                        ps.ps5000aRunBlock(
+                            self.dev_conf.mode.handle,
+                            self.dev_conf.capture.pre_trig_samples,
+                            self.dev_conf.capture.post_trig_samples,
+                            self.dev_conf.mode.timebase,
+                            None, 0, None, None
+                        )
                     block_running    = True
                 else:
                     # Do not start capture if running out of memory
@@ -373,6 +428,9 @@ class PicoDevice:
 
             # Poll for data 
             else:
+                if self._first_seen_perf is None:
+                    # brackets the first trigger of the block for its time stamps
+                    self.get_cap_count()
                 ps.ps5000aIsReady(
                     self.dev_conf.mode.handle,
                     ctypes.byref(self.pico_status.block_ready)
@@ -384,6 +442,15 @@ class PicoDevice:
                     self._tb_finish_captures()
                     block_running = False
 
+                # Block has missed its latency target, collect what it holds so far
+                elif (self.dev_conf.capture.adaptive_block and
+                      time.perf_counter() - self._arm_perf > self.dev_conf.capture.max_block_s):
+                    self.get_cap_count()
+                    if self.seg_caps > 0:
+                        self._tb_finish_captures()
+                        self.dev_conf.capture.early_stops += 1
+                        block_running = False
+
                 # 10-s no-trigger 
                 # else:
                 #     if (time.time() - block_start_time) > 10:
@@ -394,15 +461,51 @@ class PicoDevice:
                 #             self._tb_finish_captures()
                 #             break
 
-            time.sleep(0.05)
+            self.pico_status.flags.wait_abort(0.05)
         self.elapsed_time = 0.0
 
+    def _size_next_block(self):
+        """
+        Size the next time-based block so it fills in target_block_s at the measured
+        trigger rate, limited by the scope memory and the RAM budget of run_tb_setup.
+        Keeps the current size until a trigger rate has been measured.
+        """
+        capture = self.dev_conf.capture
+        capture_run = self.dev_conf.capture_run
+        samples_per_cap = capture.pre_trig_samples + capture.post_trig_samples
+        cap_period = samples_per_cap * self.dev_conf.mode.samp_time + \
+            self.buffer_manager.avg_trigger_dt()
+
+        n_chan = len(self.buffer_manager.active_channels) or 1
+        ram_caps = int(psutil.virtual_memory().available * 0.25 // (samples_per_cap * 2 * n_chan))
+        device_caps = int(capture_run.caps_max)
+
+        if self.buffer_manager.avg_trigger_dt() == 0:
+            caps, limit = int(capture_run.caps_in_run), "no trigger rate"
+        else:
+            caps, limit = int(capture.target_block_s / cap_period), "target"
+        if caps > device_caps:
+            caps, limit = device_caps, "device memory"
+        if caps > ram_caps:
+            caps, limit = ram_caps, "RAM budget"
+
+        capture_run.caps_in_run = max(caps, 1)
+        capture.block_caps = capture_run.caps_in_run
+        capture.block_limit = limit
+        capture.predicted_block_s = round(capture_run.caps_in_run * cap_period, 3)
+
     def _accumulate_pha_for_block(self):
         """
         run analysis.pha_one_peak() for the current block by
         pretending caps_in_run == seg_caps, so the loop in pha_one_peak
-        indexes only valid rows.
+        indexes only valid rows. The block must already be sliced to seg_caps,
+        every row handed to the PHA is counted as a peak.
         """
+        rows = self.buffer_manager.np_channel_arrays[0].shape[0] if (
+            self.buffer_manager.np_channel_arrays) else 0
+        if rows != self.seg_caps:
+            logging.warning("PHA of a block given %d rows for %d captures retrieved",
+                            rows, self.seg_caps)
         saved = self.dev_conf.capture_run.caps_in_run
         try:
             self.dev_conf.capture_run.caps_in_run = self.seg_caps
@@ -414,12 +517,20 @@ class PicoDevice:
         """ Calls common functions needed when stopping scope
            and retrieving data """
         # Tell the scope to stop, retrieve number of completed captures, retrieve that many
+        self._stop_perf = time.perf_counter()
+        self.metrics.record_since("trigger_wait", self._arm_perf)
         ps.ps5000aStop(self.dev_conf.mode.handle)
+        self._record_abort_latency()
         self.get_cap_count()
         self._tb_get_values_and_triggers(self._tb_current_block)
-        self._accumulate_pha_for_block()
+        self._account_live_time(
+            self.seg_caps, self.seg_caps >= self.dev_conf.capture_run.caps_in_run
+        )
+        # drop the unfilled rows of a block stopped early before they reach the PHA
         self.buffer_manager.slice_block_to_valid(self._tb_current_block, self.seg_caps)
+        self._accumulate_pha_for_block()
         self._tb_unmap_block(self._tb_current_block)
+        self.file_writer.block_completed()
 
     def _tb_get_values_and_triggers(self, block_idx: int):
         """
@@ -428,6 +539,7 @@ class PicoDevice:
         captures were actually completed.
         """
         if self.seg_caps == 0:
+            self.buffer_manager.last_trigger_stamps = np.zeros(0, dtype=np.float64)
             return
 
         total_samples = (
@@ -436,15 +548,23 @@ class PicoDevice:
         )
         max_samples = ctypes.c_int32(total_samples)
 
-        ps.ps5000aGetValuesBulk(
-            self.dev_conf.mode.handle,
-            ctypes.byref(max_samples),
-            0,       
-            self.seg_caps - 1,
-            0, 0,
-            ctypes.byref(self.buffer_manager.overflow)
-        )
+        with self.metrics.span("transfer"):
+            ps.ps5000aGetValuesBulk(
+                self.dev_conf.mode.handle,
+                ctypes.byref(max_samples),
+                0,       
+                self.seg_caps - 1,
+                0, 0,
+                ctypes.byref(self.buffer_manager.overflow)
+            )
+
+        with self.metrics.span("trigger_decode"):
+            self._tb_decode_triggers(block_idx)
+        self.metrics.count("captures", self.seg_caps)
+        self.metrics.count("blocks")
 
+    def _tb_decode_triggers(self, block_idx: int):
+        """Retrieve the trigger info of the block and store the trigger intervals."""
         trig_info = (Trigger_Info * self.seg_caps)()
         ps.ps5000aGetTriggerInfoBulk(
             self.dev_conf.mode.handle,
@@ -464,6 +584,7 @@ class PicoDevice:
             last_ctr = info.timeStampCounter
 
         self.buffer_manager.add_trigger_intervals(deltas)
+        self._store_trigger_stamps(trig_info)
 
     def _tb_unmap_block(self, block_idx: int):
         """
@@ -506,6 +627,147 @@ class PicoDevice:
 
         self.buffer_manager.trigger_times.extend(deltas)
         self.buffer_manager.add_trigger_intervals(deltas)
+        self._store_trigger_stamps(trig_info)
+
+    def _mark_block_start(self):
+        """Record when a block is armed, the first block of a capture starts the run clock."""
+        if self.start_barrier is not None and self.pico_status.flags.user_capture:
+            barrier, self.start_barrier = self.start_barrier, None
+            try:
+                barrier.wait(timeout=10)
+            except threading.BrokenBarrierError:
+                logging.warning("Synchronised start timed out or was abandoned by another "
+                                "scope, scope %s starting alone", self.dev_conf.mode.serial)
+        self.block_t0 = time.time()
+        self._arm_perf = time.perf_counter()
+        self._last_empty_perf = self._arm_perf
+        self._first_seen_perf = None
+        if self.gpio_config.capture and self.gpio_config.trigger_perf:
+            latency = self._arm_perf - self.gpio_config.trigger_perf
+            self.gpio_config.trigger_to_arm_ms = round(latency * 1000, 3)
+            self.metrics.record("trigger_to_arm", latency)
+            self.gpio_config.trigger_perf = 0.0
+        if self.run_t0 is None:
+            self.run_t0 = self.block_t0
+            self.buffer_manager.run_t0 = self.run_t0
+            self._run_perf = self._arm_perf
+            self._last_stop_perf = None
+            self.pico_status.live_time.reset()
+            self.buffer_manager.stamp_uncertainty_s = 0.0
+            self.buffer_manager.invalid_trigger_info = 0
+
+    def _record_abort_latency(self):
+        """Record the time from a user abort to the scope being stopped."""
+        flags = self.pico_status.flags
+        if flags.abort_cap and flags.abort_perf:
+            latency = time.perf_counter() - flags.abort_perf
+            flags.abort_latency_ms = round(latency * 1000, 3)
+            self.metrics.record("abort", latency)
+            flags.abort_perf = 0.0
+
+    def _account_live_time(self, n_caps: int, full: bool):
+        """
+        Update the live time of the run with the block just stopped.
+
+        Each capture makes the scope dead for one segment (pre + post trigger
+        samples) while it records and re-arms, and the time between stopping
+        one block and arming the next is dead. A block which filled every
+        segment is also dead from its last trigger until it was stopped.
+        """
+        live = self.pico_status.live_time
+        block_real = self._stop_perf - self._arm_perf
+        self.buffer_manager.run_t1 = self.block_t0 + block_real
+        seg_time = self.dev_conf.meta_data.total_cap_samples * self.dev_conf.mode.samp_time
+
+        busy = n_caps * seg_time
+        stamps = self.buffer_manager.last_trigger_stamps
+        if full and n_caps and np.isfinite(stamps).any():
+            last_trigger = float(np.nanmax(stamps)) - (self.block_t0 - self.run_t0)
+            busy = (n_caps - 1) * seg_time + max(block_real - last_trigger, 0.0)
+        block_live = min(max(block_real - busy, 0.0), block_real)
+
+        live.inter_block_gap_s = (
+            self._arm_perf - self._last_stop_perf if self._last_stop_perf is not None else 0.0
+        )
+        live.block_real_s = block_real
+        live.block_live_s = block_live
+        live.block_dead_fraction = 1 - block_live / block_real if block_real > 0 else 0.0
+
+        live.blocks += 1
+        live.captures += n_caps
+        live.live_time_s += block_live
+        live.real_time_s = self._stop_perf - self._run_perf
+        live.dead_time_s = live.real_time_s - live.live_time_s
+        live.dead_fraction = (
+            live.dead_time_s / live.real_time_s if live.real_time_s > 0 else 0.0
+        )
+        self._last_stop_perf = self._stop_perf
+
+    def _first_trigger_offset(self, span: float):
+        """
+        Return the time (s) from arming the block to its first trigger, and its
+        uncertainty. The time stamp counter does not start at RunBlock, so the
+        offset is bracketed by the last capture count poll that saw no captures
+        and the first that saw one. The last capture also has to be recorded
+        before the block stopped, which bounds the offset from above.
+        """
+        seg_time = self.dev_conf.meta_data.total_cap_samples * self.dev_conf.mode.samp_time
+        block_real = max(self._stop_perf - self._arm_perf, 0.0)
+        lower = max(self._last_empty_perf - self._arm_perf, 0.0)
+        upper = block_real
+        if self._first_seen_perf is not None:
+            upper = self._first_seen_perf - self._arm_perf
+        upper = max(min(upper, block_real - span - seg_time), lower)
+        return (lower + upper) / 2, (upper - lower) / 2
+
+    def _store_trigger_stamps(self, trig_info):
+        """
+        Convert trigger time stamp counters to seconds since the start of the run.
+        Stamps within a block are counter differences from its first trigger, the
+        first trigger is placed by _first_trigger_offset. Segments whose trigger
+        info is not valid get NaN, a counter reset part way through a block
+        restarts the differences at least one segment after the previous trigger.
+        """
+        samp_time = self.dev_conf.mode.samp_time
+        seg_time = self.dev_conf.meta_data.total_cap_samples * samp_time
+        stamps = np.full(len(trig_info), np.nan)
+        base = None
+        offset = 0.0
+        for i, info in enumerate(trig_info):
+            if info.status not in (PICO_OK, PICO_DEVICE_TIME_STAMP_RESET):
+                self.buffer_manager.invalid_trigger_info += 1
+                continue
+            if base is None or info.status == PICO_DEVICE_TIME_STAMP_RESET:
+                if base is not None:
+                    offset = float(np.nanmax(stamps[:i])) + seg_time
+                    self.buffer_manager.invalid_trigger_info += 1
+                base = info.timeStampCounter
+            stamps[i] = offset + (info.timeStampCounter - base) * samp_time
+
+        valid = np.isfinite(stamps)
+        span = float(stamps[valid].max()) if valid.any() else 0.0
+        first_offset, uncertainty = self._first_trigger_offset(span)
+        self.buffer_manager.stamp_uncertainty_s = max(
+            self.buffer_manager.stamp_uncertainty_s, uncertainty)
+
+        stamps += (self.block_t0 - (self.run_t0 or self.block_t0)) + first_offset
+        self.buffer_manager.last_trigger_stamps = stamps
+        self.buffer_manager.trigger_rate.add_stamps(
+            stamps[valid] + (self.run_t0 or self.block_t0)
+        )
+
+    @staticmethod
+    def enumerate_units() -> list:
+        """Return the serial numbers of every connected PicoScope 5000A."""
+        count = ctypes.c_int16(0)
+        serials = ctypes.create_string_buffer(256)
+        serial_len = ctypes.c_int16(len(serials))
+        status = ps.ps5000aEnumerateUnits(
+            ctypes.byref(count), serials, ctypes.byref(serial_len)
+        )
+        if status != 0 or count.value == 0:
+            return []
+        return [s for s in serials.value.decode().split(",") if s]
 
     def ping_scope(self):
         """Responsible for checking the connection to the picoscope is still live."""
@@ -519,6 +781,10 @@ class PicoDevice:
         caps = ctypes.c_uint32(0)
         ps.ps5000aGetNoOfCaptures(self.dev_conf.mode.handle, ctypes.byref(caps))
         self.seg_caps = caps.value
+        if caps.value == 0:
+            self._last_empty_perf = time.perf_counter()
+        elif self._first_seen_perf is None:
+            self._first_seen_perf = time.perf_counter()
         self.dev_conf.capture_run.live_cap_comp = (
             self.dev_conf.capture_run.caps_comp + caps.value
         )
@@ -0,0 +1,147 @@
+"""On-demand profiling of the capture thread, controlled from the parameter tree."""
+
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class CaptureProfiler:
+    """Profile the capture thread for a set duration without restarting the adapter.
+
+    cProfile only sees the thread that enables it, so a cProfile run is started
+    and stopped by the capture thread itself through poll(), called each
+    iteration of update_loop. A run therefore ends at the first iteration after
+    its duration has passed (e.g. once a time-based capture completes).
+    The sampling profiler runs in its own thread, reading the capture thread's
+    stack through sys._current_frames, and writes collapsed stacks suitable for
+    flamegraph.pl or speedscope.
+    """
+
+    MODES = ("cprofile", "sampling")
+
+    def __init__(self):
+        """Initialise the CaptureProfiler class."""
+        self.mode = "cprofile"
+        self.duration_s = 30.0
+        self.sample_interval_ms = 5.0
+        self.output_folder = "/tmp/"
+        self.target_ident = None
+        self.active = False
+        self.last_output = ""
+        self.samples = 0
+
+        self._requested = False
+        self._stop_requested = False
+        self._start_time = 0.0
+        self._profile = None
+        self._sampler = None
+
+    def set_mode(self, value):
+        """Select the profiler used by the next run."""
+        if value in self.MODES and not self.active:
+            self.mode = value
+
+    def set_duration(self, value):
+        """Set the length (s) of a profiling run."""
+        self.duration_s = abs(value)
+
+    def set_sample_interval(self, value):
+        """Set the sampling interval (ms) of the sampling profiler."""
+        self.sample_interval_ms = max(abs(value), 0.1)
+
+    def elapsed(self):
+        """Return the time (s) the current run has been going."""
+        return round(time.time() - self._start_time, 1) if self.active else 0.0
+
+    def start(self, _=None):
+        """Request a profiling run of the capture thread."""
+        if self.active or self._requested:
+            return
+        if self.mode == "sampling":
+            self._start_sampling()
+        else:
+            # picked up by the capture thread in poll()
+            self._requested = True
+
+    def stop(self, _=None):
+        """End the current run early, the results are still written."""
+        self._requested = False
+        self._stop_requested = True
+
+    def poll(self):
+        """Start or stop cProfile, must be called from the capture thread."""
+        self.target_ident = threading.get_ident()
+
+        if self._requested:
+            self._requested = False
+            self._stop_requested = False
+            self._profile = cProfile.Profile()
+            self._start_time = time.time()
+            self.active = True
+            self._profile.enable()
+            logging.info("cProfile started on the capture thread for %.1fs", self.duration_s)
+
+        elif self._profile is not None and (
+                self._stop_requested or time.time() - self._start_time >= self.duration_s):
+            self._profile.disable()
+            fname = self._output_name("pstats")
+            try:
+                self._profile.dump_stats(fname)
+                self.last_output = fname
+                logging.info("Wrote cProfile statistics to %s", fname)
+            except OSError as e:
+                logging.error(f"Could not write profile {fname}: {e}")
+            self._profile = None
+            self.active = False
+
+    def _output_name(self, ext):
+        """Return a timestamped file name in the output folder."""
+        return os.path.join(
+            self.output_folder, time.strftime(f"odin_pico_profile_%Y%m%d_%H%M%S.{ext}"))
+
+    def _start_sampling(self):
+        """Start the sampling thread."""
+        if self.target_ident is None:
+            logging.error("Capture thread has not started, cannot profile it")
+            return
+        self._stop_requested = False
+        self._start_time = time.time()
+        self.active = True
+        self._sampler = threading.Thread(
+            target=self._sample, name="odin_pico_sampler", daemon=True)
+        self._sampler.start()
+
+    def _sample(self):
+        """Sampling thread, count the capture thread's stacks until the run ends."""
+        stacks = Counter()
+        interval = self.sample_interval_ms / 1000
+        self.samples = 0
+        logging.info("Sampling the capture thread every %.1fms for %.1fs",
+                     self.sample_interval_ms, self.duration_s)
+
+        while not self._stop_requested and time.time() - self._start_time < self.duration_s:
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is not None:
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+            time.sleep(interval)
+
+        fname = self._output_name("collapsed")
+        try:
+            with open(fname, "w") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+            self.last_output = fname
+            logging.info("Wrote %d stack samples to %s", self.samples, fname)
+        except OSError as e:
+            logging.error(f"Could not write profile {fname}: {e}")
+        self.active = False
@@ -0,0 +1,166 @@
+"""Offline reprocessing of saved odin-pico HDF5 files.
+
+Regenerates the pha_N datasets of existing capture files from their adc_counts_N
+waveforms, streaming chunks of captures through a pool of worker processes so
+that large campaigns can be re-binned without loading whole files into memory.
+
+Example usage:
+    odin-pico-reprocess /data/pico/data/run_*.hdf5 --bins 2048 --range 0 32512 --workers 8
+"""
+
+import argparse
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent import futures
+
+import h5py
+import numpy as np
+
+from odin_pico.analysis import PicoAnalysis
+
+
+ADC_DATASET = re.compile(r"^adc_counts_(\d+)$")
+
+
+def plan_chunks(fname, chunk_size):
+    """Return a (fname, dataset, start, stop) task for every chunk of every waveform dataset."""
+    tasks = []
+    with h5py.File(fname, "r") as f:
+        for name in f:
+            if not ADC_DATASET.match(name) or f[name].ndim != 2:
+                continue
+            n_caps = f[name].shape[0]
+            for start in range(0, n_caps, chunk_size):
+                tasks.append((fname, name, start, min(start + chunk_size, n_caps)))
+    return tasks
+
+
+def process_chunk(task, num_bins, lower_range, upper_range, mode, pre_trig_samples):
+    """Worker function, histogram the peak heights of one chunk of captures."""
+    fname, name, start, stop = task
+    with h5py.File(fname, "r") as f:
+        captures = f[name][start:stop]
+
+    peaks = PicoAnalysis.extract_peaks(captures, mode, pre_trig_samples)
+    counts, bin_edges = PicoAnalysis.histogram_peaks(peaks, num_bins, lower_range, upper_range)
+    return task, counts, bin_edges[:-1], captures.nbytes
+
+
+def write_pha(fname, pha, suffix, settings):
+    """Replace (or add, when a suffix is given) the pha_N datasets of a file."""
+    with h5py.File(fname, "a") as f:
+        for name, (edges, counts) in sorted(pha.items()):
+            ch_id = ADC_DATASET.match(name).group(1)
+            pha_name = f"pha_{ch_id}{suffix}"
+            if pha_name in f:
+                del f[pha_name]
+            dset = f.create_dataset(pha_name, data=[edges, counts])
+            for key, value in settings.items():
+                dset.attrs[key] = value
+
+
+def reprocess(files, num_bins, lower_range, upper_range, mode="max",
+              pre_trig_samples=0, chunk_size=4096, workers=None, suffix=""):
+    """
+    Regenerate the PHA of every file, returns a dict of totals for reporting.
+    Files are written as soon as all of their chunks have been processed.
+    """
+    settings = {
+        "num_bins": num_bins,
+        "lower_range": lower_range,
+        "upper_range": upper_range,
+        "extraction_mode": mode,
+    }
+
+    tasks = []
+    for fname in files:
+        try:
+            file_tasks = plan_chunks(fname, chunk_size)
+        except OSError as e:
+            logging.error(f"Skipping {fname}: {e}")
+            continue
+        if not file_tasks:
+            logging.warning(f"Skipping {fname}: no adc_counts datasets")
+        tasks.extend(file_tasks)
+
+    remaining = defaultdict(int)
+    for task in tasks:
+        remaining[task[0]] += 1
+
+    pha = defaultdict(dict)
+    file_bytes = defaultdict(int)
+    totals = {"files": 0, "chunks": 0, "bytes": 0}
+    start_time = time.time()
+
+    with futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = [
+            pool.submit(process_chunk, task, num_bins, lower_range, upper_range,
+                        mode, pre_trig_samples)
+            for task in tasks
+        ]
+        for future in futures.as_completed(pending):
+            (fname, name, _, _), counts, edges, nbytes = future.result()
+
+            if name in pha[fname]:
+                pha[fname][name][1] += counts
+            else:
+                pha[fname][name] = [edges, counts.astype(np.int64)]
+            file_bytes[fname] += nbytes
+            totals["chunks"] += 1
+            totals["bytes"] += nbytes
+
+            remaining[fname] -= 1
+            if remaining[fname] == 0:
+                write_pha(fname, pha.pop(fname), suffix, settings)
+                totals["files"] += 1
+                logging.info(
+                    f"{os.path.basename(fname)}: {file_bytes[fname] / 1024**2:.1f} MB "
+                    f"({totals['files']}/{len(remaining)} files)")
+
+    totals["elapsed"] = time.time() - start_time
+    return totals
+
+
+def main(argv=None):
+    """Entry point for the odin-pico-reprocess command."""
+    parser = argparse.ArgumentParser(
+        description="Regenerate the PHA datasets of saved odin-pico HDF5 files.")
+    parser.add_argument("files", nargs="+", help="HDF5 capture files to reprocess")
+    parser.add_argument("--bins", type=int, default=1024, help="number of PHA bins")
+    parser.add_argument("--range", type=int, nargs=2, default=(0, 32767),
+                        metavar=("LOWER", "UPPER"), help="PHA range in ADC counts")
+    parser.add_argument("--mode", choices=("max", "baseline"), default="max",
+                        help="peak extraction mode")
+    parser.add_argument("--pre-trig-samples", type=int, default=0,
+                        help="pre-trigger samples per capture, used by baseline mode")
+    parser.add_argument("--chunk-size", type=int, default=4096,
+                        help="captures read per worker task")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: number of CPUs)")
+    parser.add_argument("--suffix", default="",
+                        help="write pha_N<suffix> instead of replacing pha_N")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.bins < 1 or args.range[1] <= args.range[0]:
+        parser.error("--bins must be positive and --range UPPER must be above LOWER")
+
+    totals = reprocess(
+        args.files, args.bins, args.range[0], args.range[1], args.mode,
+        args.pre_trig_samples, args.chunk_size, args.workers, args.suffix
+    )
+
+    elapsed = max(totals["elapsed"], 1e-9)
+    logging.info(
+        f"Reprocessed {totals['files']} files, {totals['chunks']} chunks, "
+        f"{totals['bytes'] / 1024**2:.1f} MB in {elapsed:.1f}s "
+        f"({totals['bytes'] / 1024**2 / elapsed:.1f} MB/s, "
+        f"{totals['files'] / elapsed:.2f} files/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Predict when the TEC will settle by fitting an exponential approach to recent readings."""
+
+import math
+
+import numpy as np
+
+
+class SettlingEstimator:
+    """Fit T(t) = T_inf + A * exp(-t / tau) to the recent temperature readings.
+
+    For a fixed tau the model is linear in T_inf and A, so each tau on a log
+    spaced grid is solved by least squares and the best fit kept. The TEC is
+    declared stable once the fitted temperature now, and the asymptote plus
+    twice its standard error, are within tolerance of the target, as is the
+    latest reading, and the residual noise is below tolerance, without waiting
+    for a full stability window of readings.
+    """
+
+    TAU_GRID = np.logspace(0, math.log10(600), 40)
+
+    def __init__(self, window_s: float = 60.0, min_readings: int = 5, confidence: float = 2.0):
+        """Initialise the SettlingEstimator class."""
+        self.window_s = window_s
+        self.min_readings = min_readings
+        self.confidence = confidence
+        self.reset()
+
+    def reset(self):
+        """Forget the readings of the previous set point."""
+        self.times = []
+        self.temps = []
+        self.fit = None
+
+    def add(self, t: float, temp: float):
+        """Add a reading taken at time t (s), dropping readings older than the fit window."""
+        self.times.append(t)
+        self.temps.append(temp)
+        while self.times[-1] - self.times[0] > self.window_s and len(self.times) > self.min_readings:
+            self.times.pop(0)
+            self.temps.pop(0)
+
+    def update(self):
+        """Fit the readings, returns the fit dict or None when there are too few."""
+        if len(self.times) < self.min_readings:
+            self.fit = None
+            return None
+
+        t = np.asarray(self.times) - self.times[0]
+        y = np.asarray(self.temps)
+        best = None
+        for tau in self.TAU_GRID:
+            X = np.column_stack((np.ones_like(t), np.exp(-t / tau)))
+            coeffs, _, rank, _ = np.linalg.lstsq(X, y, rcond=None)
+            if rank < 2:
+                continue
+            sse = float(np.sum((y - X @ coeffs) ** 2))
+            if best is None or sse < best[0]:
+                best = (sse, tau, coeffs, X)
+
+        if best is None:
+            # flat readings, nothing to fit an exponential to
+            sigma = float(y.std())
+            self.fit = {"temp_inf": float(y.mean()), "amplitude": 0.0, "tau_s": 0.0,
+                        "sigma": sigma, "temp_inf_err": sigma / math.sqrt(len(y)), "t_now": t[-1]}
+            return self.fit
+
+        sse, tau, (temp_inf, amplitude), X = best
+        dof = max(len(y) - 2, 1)
+        sigma = math.sqrt(sse / dof)
+        cov = np.linalg.pinv(X.T @ X) * sigma ** 2
+        self.fit = {
+            "temp_inf": float(temp_inf),
+            "amplitude": float(amplitude),
+            "tau_s": float(tau),
+            "sigma": sigma,
+            "temp_inf_err": math.sqrt(max(cov[0, 0], 0.0)),
+            "t_now": float(t[-1]),
+        }
+        return self.fit
+
+    def predicted_settle_s(self, target: float, tol: float) -> float:
+        """Seconds until the fitted temperature is within tol of target, -1 if it never will be."""
+        fit = self.fit
+        if fit is None:
+            return -1.0
+        margin = tol - abs(fit["temp_inf"] - target)
+        if margin <= 0:
+            return -1.0
+        if abs(fit["amplitude"]) <= margin or fit["tau_s"] == 0:
+            return 0.0
+        t_settle = fit["tau_s"] * math.log(abs(fit["amplitude"]) / margin)
+        return max(t_settle - fit["t_now"], 0.0)
+
+    def is_stable(self, target: float, tol: float) -> bool:
+        """Return True when the latest fit has settled within tol of target with confidence."""
+        fit = self.fit
+        if fit is None:
+            return False
+        now = fit["temp_inf"] + fit["amplitude"] * (
+            math.exp(-fit["t_now"] / fit["tau_s"]) if fit["tau_s"] else 0.0)
+        return (
+            abs(self.temps[-1] - target) <= tol and
+            abs(now - target) <= tol and
+            abs(fit["temp_inf"] - target) + self.confidence * fit["temp_inf_err"] <= tol and
+            fit["sigma"] <= tol
+        )
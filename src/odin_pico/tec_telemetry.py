@@ -0,0 +1,143 @@
+"""Background polling of TEC telemetry into a timestamped cache."""
+
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from odin_pico.pico_controller import PicoController
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from odin_pico.trigger_rate import RingBuffer
+
+# One row per telemetry sample, time is the wall clock time the sample was read
+TELEMETRY_DTYPE = np.dtype([
+    ("time", np.float64),
+    ("temp_meas", np.float32),
+    ("setpoint", np.float32),
+    ("current", np.float32),
+    ("voltage", np.float32),
+    ("power", np.float32),
+])
+
+# Info tree field recorded in each column
+TELEMETRY_FIELDS = {
+    "temp_meas": "tec_temp_meas",
+    "setpoint": "tec_setpoint",
+    "current": "tec_current",
+    "voltage": "tec_voltage",
+    "power": "tec_power",
+}
+
+
+class TecTelemetry:
+    """Read every TEC info field in one request at a fixed rate and serve them from a cache.
+
+    Parameter tree reads and wait_for_tec both use the cache, so the GPIB bus
+    sees one request per interval whatever the number of clients polling. Each
+    sample is stored with the time it was read, letting readers skip samples
+    they have already seen, and is kept in a ring buffer so captures can store
+    the temperature history of their run.
+    """
+
+    def __init__(self, controller: PicoController, capacity: int = 100000):
+        """Initialise the TecTelemetry class."""
+        self.controller = controller
+        self.polls = 0
+        self.errors = 0
+        self._sample = (0.0, {})
+        self._history = RingBuffer(capacity, TELEMETRY_DTYPE)
+        self._history_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the polling thread."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="odin_pico_tec_telemetry",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread."""
+        self._stop.set()
+        if self.running:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        """Polling thread, reads the info fields every telemetry_interval_s."""
+        while not self._stop.is_set():
+            start = time.time()
+            self.poll_once()
+            interval = max(self.controller.gpib_config.telemetry_interval_s, 0.05)
+            self._stop.wait(max(interval - (time.time() - start), 0.0))
+
+    def poll_once(self):
+        """Read all info fields of the selected TEC in one request."""
+        tec = self.controller.gpib_config.selected_tec
+        if not tec or getattr(self.controller, "gpib", None) is None:
+            return
+        try:
+            info = self.controller.util.iac_get(self.controller.gpib, f"devices/{tec}/info")
+        except Exception as e:
+            info = None
+            logging.debug(f"[TEC] Telemetry read failed: {e}")
+        self.polls += 1
+        if isinstance(info, dict):
+            self._sample = (time.time(), info)
+            self._record(*self._sample)
+        else:
+            self.errors += 1
+
+    def _record(self, timestamp, info):
+        """Append a sample to the history, fields that were not read are stored as NaN."""
+        row = np.zeros(1, dtype=TELEMETRY_DTYPE)
+        row["time"] = timestamp
+        for column, field in TELEMETRY_FIELDS.items():
+            value = info.get(field)
+            row[column] = value if isinstance(value, (int, float)) else np.nan
+        with self._history_lock:
+            self._history.extend(row)
+
+    def history(self, t0: float, t1: float = None) -> np.ndarray:
+        """
+        Return the samples read from t0 (wall clock, s) until t1, plus the sample
+        either side so every trigger can be interpolated. Time is made relative
+        to t0, so it shares the clock of the trigger time stamps.
+        """
+        with self._history_lock:
+            rows = self._history.values()
+            first = max(int(np.searchsorted(rows["time"], t0, side="right")) - 1, 0)
+            last = (len(rows) if t1 is None
+                    else int(np.searchsorted(rows["time"], t1, side="left")) + 1)
+            rows = rows[first:last].copy()
+        rows["time"] -= t0
+        return rows
+
+    def read(self, field: str):
+        """
+        Return (timestamp, value) of a field from the latest sample. Without the
+        polling thread the sample is read on demand.
+        """
+        if not self.running:
+            self.poll_once()
+        timestamp, info = self._sample
+        return timestamp, info.get(field)
+
+    def get(self, field: str):
+        """Return the cached value of a field, for the parameter tree."""
+        return self._sample[1].get(field)
+
+    def age(self) -> float:
+        """Return the age (s) of the latest sample, -1 if there is none."""
+        timestamp = self._sample[0]
+        return round(time.time() - timestamp, 2) if timestamp else -1.0
@@ -0,0 +1,104 @@
+"""Opt-in ring-buffer event recorder, dumped in the Chrome trace event format."""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class TraceRecorder:
+    """Record begin/end (complete) events per thread into a bounded ring buffer.
+
+    When disabled a span costs one attribute check. When enabled each event is
+    a tuple appended to a deque, JSON is only built when the trace is dumped.
+    The output opens in chrome://tracing or https://ui.perfetto.dev.
+    """
+
+    def __init__(self, capacity: int = 100000):
+        """Initialise the TraceRecorder class."""
+        self.enabled = False
+        self.capacity = capacity
+        self.events = deque(maxlen=capacity)
+        self.last_dump = ""
+        self._origin = time.perf_counter()
+        self._origin_wall = time.time()
+
+    def set_enabled(self, value):
+        """Start or stop recording, events already recorded are kept until dumped."""
+        self.enabled = bool(value)
+
+    def set_capacity(self, value):
+        """Resize the ring buffer, keeping the most recent events."""
+        self.capacity = max(int(value), 1)
+        self.events = deque(self.events, maxlen=self.capacity)
+
+    def clear(self, *_):
+        """Drop every recorded event."""
+        self.events.clear()
+
+    def complete(self, name: str, start: float, duration: float, cat: str = "acq"):
+        """Store an event which began at start (perf_counter) and lasted duration (s)."""
+        if self.enabled:
+            thread = threading.current_thread()
+            self.events.append((name, cat, start, duration, thread.ident, thread.name))
+
+    def instant(self, name: str, cat: str = "acq"):
+        """Store a zero length marker, e.g. a trigger arriving."""
+        self.complete(name, time.perf_counter(), None, cat)
+
+    @contextmanager
+    def span(self, name: str, cat: str = "acq"):
+        """Record the enclosed block as one event."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.complete(name, start, time.perf_counter() - start, cat)
+
+    def to_chrome_trace(self) -> dict:
+        """Return the recorded events as a Chrome trace event dictionary."""
+        pid = os.getpid()
+        trace_events = []
+        thread_names = {}
+        for name, cat, start, duration, tid, thread_name in list(self.events):
+            thread_names[tid] = thread_name
+            event = {
+                "name": name, "cat": cat, "pid": pid, "tid": tid,
+                "ts": round((start - self._origin) * 1e6, 3),
+            }
+            if duration is None:
+                event.update(ph="i", s="t")
+            else:
+                event.update(ph="X", dur=round(duration * 1e6, 3))
+            trace_events.append(event)
+
+        for tid, thread_name in thread_names.items():
+            trace_events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid,
+                                 "args": {"name": thread_name}})
+
+        return {
+            "traceEvents": trace_events,
+            "displayTimeUnit": "ms",
+            "otherData": {"origin_unix_time": self._origin_wall},
+        }
+
+    def dump(self, folder: str) -> str:
+        """Write the trace to a timestamped JSON file in folder, returning its path."""
+        fname = os.path.join(
+            folder, time.strftime("odin_pico_trace_%Y%m%d_%H%M%S.json"))
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with open(fname, "w") as f:
+                json.dump(self.to_chrome_trace(), f)
+        except OSError as e:
+            logging.error(f"Could not write trace file {fname}: {e}")
+            return ""
+        self.last_dump = fname
+        logging.info("Wrote %d trace events to %s", len(self.events), fname)
+        return fname
@@ -0,0 +1,132 @@
+"""Rolling trigger-rate estimation from decoded trigger time stamps and intervals."""
+
+import numpy as np
+
+
+class RingBuffer:
+    """Fixed capacity numpy ring buffer, of float64 values unless another dtype is given."""
+
+    def __init__(self, capacity: int, dtype=np.float64):
+        """Initialise the RingBuffer class."""
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        """Forget every stored value."""
+        self._next = 0
+        self._count = 0
+
+    def extend(self, values):
+        """Append values, overwriting the oldest once full."""
+        values = np.asarray(values, dtype=self._data.dtype)[-self.capacity:]
+        n = len(values)
+        if n == 0:
+            return
+        end = self._next + n
+        if end <= self.capacity:
+            self._data[self._next:end] = values
+        else:
+            split = self.capacity - self._next
+            self._data[self._next:] = values[:split]
+            self._data[:n - split] = values[split:]
+        self._next = end % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def values(self) -> np.ndarray:
+        """Return the stored values, oldest first."""
+        if self._count < self.capacity:
+            return self._data[:self._count]
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+
+
+class TriggerRateEstimator:
+    """Estimate trigger rates over several time scales and histogram the trigger intervals.
+
+    All statistics are recalculated when a block of triggers is added, so reading
+    them from the parameter tree is a dictionary lookup whatever the history size.
+    Windowed rates end at the most recent decoded trigger, as triggers only become
+    known once a block has been retrieved from the scope.
+    """
+
+    WINDOWS = (1.0, 10.0)
+    # 4 log bins per decade, 1 ns to 100 s
+    HIST_EDGES = np.logspace(-9, 2, 45)
+
+    def __init__(self, interval_capacity: int = 500, stamp_capacity: int = 100000,
+                 instant_intervals: int = 10):
+        """Initialise the TriggerRateEstimator class."""
+        self.instant_intervals = instant_intervals
+        self._intervals = RingBuffer(interval_capacity)
+        self._stamps = RingBuffer(stamp_capacity)
+        self.avg_dt = 0
+        self.rates = {}
+        self.reset_run()
+
+    def reset_run(self):
+        """Start the run average and interval histogram again."""
+        self._run_first = None
+        self._run_last = None
+        self._run_triggers = 0
+        self.hist_counts = np.zeros(len(self.HIST_EDGES) - 1, dtype=np.int64)
+        self._update_rates()
+
+    def add_intervals(self, deltas):
+        """Add trigger intervals (s), updating the mean interval and the histogram."""
+        deltas = np.asarray(deltas, dtype=np.float64)
+        if len(deltas) == 0:
+            return
+        self._intervals.extend(deltas)
+        self.avg_dt = float(self._intervals.values().mean())
+
+        bins = np.searchsorted(self.HIST_EDGES, deltas, side="right") - 1
+        bins = bins[(bins >= 0) & (bins < len(self.hist_counts))]
+        self.hist_counts += np.bincount(bins, minlength=len(self.hist_counts))
+        self._update_rates()
+
+    def add_stamps(self, stamps):
+        """Add the absolute trigger times (s) of one block."""
+        stamps = np.asarray(stamps, dtype=np.float64)
+        if len(stamps) == 0:
+            return
+        self._stamps.extend(stamps)
+        if self._run_first is None:
+            self._run_first = stamps[0]
+        self._run_last = stamps[-1]
+        self._run_triggers += len(stamps)
+        self._update_rates()
+
+    def _window_rate(self, stamps, window):
+        """Rate (Hz) of the triggers within window seconds of the latest trigger."""
+        first = np.searchsorted(stamps, stamps[-1] - window, side="left")
+        in_window = len(stamps) - first
+        span = stamps[-1] - stamps[first]
+        return (in_window - 1) / span if in_window > 1 and span > 0 else 0.0
+
+    def _update_rates(self):
+        """Recalculate the published rates."""
+        rates = {"instantaneous_hz": 0.0}
+        recent = self._intervals.values()[-self.instant_intervals:]
+        if len(recent) and recent.mean() > 0:
+            rates["instantaneous_hz"] = 1 / float(recent.mean())
+
+        stamps = self._stamps.values()
+        for window in self.WINDOWS:
+            rates[f"rate_{window:g}s_hz"] = (
+                float(self._window_rate(stamps, window)) if len(stamps) else 0.0
+            )
+
+        run_span = (self._run_last - self._run_first) if self._run_triggers > 1 else 0
+        rates["run_average_hz"] = (
+            float((self._run_triggers - 1) / run_span) if run_span > 0 else 0.0
+        )
+        rates["run_triggers"] = self._run_triggers
+        self.rates = {k: round(v, 3) if isinstance(v, float) else v for k, v in rates.items()}
+
+    def histogram(self) -> dict:
+        """Return the log-binned interval histogram of the current run."""
+        return {"bin_edges_s": self.HIST_EDGES.tolist(), "counts": self.hist_counts.tolist()}